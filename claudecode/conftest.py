@@ -0,0 +1,73 @@
+"""Shared pytest fixtures for claudecode tests."""
+
+import pytest
+from contextlib import ExitStack
+from unittest.mock import Mock, patch
+
+from claudecode.constants import default_claude_model, default_llm_provider
+from claudecode.llm_client_factory import clear_client_cache
+
+# SDK client classes (sync and async) replaced for the whole run, by name. Vertex and
+# Bedrock clients import their SDK classes from anthropic when constructed, so patch
+# them there.
+_SDK_TARGETS = {
+    "anthropic": 'claudecode.anthropic_client.Anthropic',
+    "vertex": 'anthropic.AnthropicVertex',
+    "bedrock": 'anthropic.AnthropicBedrock',
+    "async_anthropic": 'claudecode.anthropic_client.AsyncAnthropic',
+    "async_vertex": 'anthropic.AsyncAnthropicVertex',
+    "async_bedrock": 'anthropic.AsyncAnthropicBedrock',
+}
+
+
+@pytest.fixture(autouse=True)
+def _reset_llm_client_cache():
+    """Keep cached LLM clients and environment-derived defaults from leaking between tests."""
+    clear_client_cache()
+    default_claude_model.cache_clear()
+    default_llm_provider.cache_clear()
+    yield
+    clear_client_cache()
+    default_claude_model.cache_clear()
+    default_llm_provider.cache_clear()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _patch_sdks():
+    """Patch every provider SDK client class once per session so no test can reach a real API."""
+    with ExitStack() as stack:
+        yield {
+            name: stack.enter_context(patch(target, new_callable=Mock))
+            for name, target in _SDK_TARGETS.items()
+        }
+
+
+@pytest.fixture(autouse=True)
+def _reset_sdk_mocks(_patch_sdks):
+    """Clear call history and configured return values on the shared SDK mocks before each test."""
+    for mock_sdk in _patch_sdks.values():
+        mock_sdk.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture
+def mock_anthropic(_patch_sdks):
+    """Patched Anthropic SDK client class."""
+    return _patch_sdks["anthropic"]
+
+
+@pytest.fixture
+def mock_vertex(_patch_sdks):
+    """Patched Vertex AI SDK client class."""
+    return _patch_sdks["vertex"]
+
+
+@pytest.fixture
+def mock_bedrock(_patch_sdks):
+    """Patched Bedrock SDK client class."""
+    return _patch_sdks["bedrock"]
+
+
+@pytest.fixture
+def mock_async_anthropic(_patch_sdks):
+    """Patched async Anthropic SDK client class."""
+    return _patch_sdks["async_anthropic"]
@@ -3,16 +3,41 @@ Constants and configuration values for ClaudeCode.
 """
 
 import os
+from functools import lru_cache
 
 # API Configuration
-DEFAULT_CLAUDE_MODEL = os.environ.get('CLAUDE_MODEL') or 'claude-opus-4-20250514'
+DEFAULT_CLAUDE_MODEL = 'claude-opus-4-20250514'  # Used when CLAUDE_MODEL is not set
 DEFAULT_TIMEOUT_SECONDS = 180  # 3 minutes
 DEFAULT_MAX_RETRIES = 3
 RATE_LIMIT_BACKOFF_MAX = 30  # Maximum backoff time for rate limits
+RETRY_BACKOFF_BASE = 0.5  # Minimum backoff between retries, in seconds
+DEFAULT_REQUESTS_PER_MINUTE = 0  # Client-side throttle, off unless LLM_REQUESTS_PER_MINUTE sets a quota
+DEFAULT_MAX_CONCURRENCY = 8  # Simultaneous in-flight requests when analyzing findings
+
+# HTTP Connection Pool Configuration
+DEFAULT_POOL_MAX_CONNECTIONS = 32
+DEFAULT_POOL_MAX_KEEPALIVE = 16
+DEFAULT_POOL_KEEPALIVE_EXPIRY = 90.0  # seconds an idle connection is kept open
 
 # LLM Provider Configuration
-DEFAULT_LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'anthropic').lower()
-SUPPORTED_LLM_PROVIDERS = ['anthropic', 'vertex', 'bedrock']
+DEFAULT_LLM_PROVIDER = 'anthropic'  # Used when LLM_PROVIDER is not set
+
+
+@lru_cache(maxsize=1)
+def default_claude_model() -> str:
+    """Get the default Claude model, honoring the CLAUDE_MODEL environment variable.
+    
+    Read on first call rather than at import time, so environment changes made
+    before the first client is created are picked up.
+    """
+    return os.environ.get('CLAUDE_MODEL') or DEFAULT_CLAUDE_MODEL
+
+
+@lru_cache(maxsize=1)
+def default_llm_provider() -> str:
+    """Get the default LLM provider, honoring the LLM_PROVIDER environment variable."""
+    return (os.environ.get('LLM_PROVIDER') or DEFAULT_LLM_PROVIDER).lower()
+
 
 # Token Limits
 PROMPT_TOKEN_LIMIT = 16384  # 16k tokens max for claude-opus-4
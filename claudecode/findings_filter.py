@@ -1,5 +1,6 @@
 """Findings filter for reducing false positives in security audit results."""
 
+import os
 import re
 from typing import Dict, Any, List, Tuple, Optional, Pattern
 import time
@@ -7,7 +8,7 @@ from dataclasses import dataclass, field
 
 from claudecode.llm_client_factory import LLMClientFactory, LLMConfig
 from claudecode.llm_client_base import CloudProvider
-from claudecode.constants import DEFAULT_CLAUDE_MODEL
+from claudecode.constants import DEFAULT_MAX_CONCURRENCY
 from claudecode.logger import get_logger
 
 logger = get_logger(__name__)
@@ -162,9 +163,10 @@ class FindingsFilter:
                  use_hard_exclusions: bool = True,
                  use_claude_filtering: bool = True,
                  api_key: Optional[str] = None,
-                 model: str = DEFAULT_CLAUDE_MODEL,
+                 model: Optional[str] = None,
                  custom_filtering_instructions: Optional[str] = None,
-                 provider: Optional[str] = None):
+                 provider: Optional[str] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
         """Initialize findings filter.
         
         Args:
@@ -173,38 +175,40 @@ class FindingsFilter:
             api_key: API key for LLM filtering (Anthropic only)
             model: Model to use for filtering
             custom_filtering_instructions: Optional custom filtering instructions
-            provider: LLM provider ('anthropic', 'vertex', 'bedrock'). If None, uses environment or defaults to anthropic
+            provider: LLM provider ('anthropic', 'vertex', 'bedrock'). If None, uses LLM_PROVIDER or defaults to anthropic
+            max_concurrency: Maximum number of findings analyzed by the LLM at the same time
         """
         self.use_hard_exclusions = use_hard_exclusions
         self.use_claude_filtering = use_claude_filtering
         self.custom_filtering_instructions = custom_filtering_instructions
+        self.max_concurrency = max_concurrency
         
         # Initialize LLM client if filtering is enabled
         self.claude_client = None
         if self.use_claude_filtering:
             try:
+                # Explicit arguments override the environment; every other LLM_*
+                # setting (caches, rate limit, HTTP/2) is still read from it
+                env = os.environ.copy()
                 if provider:
-                    # Use specified provider
+                    env['LLM_PROVIDER'] = provider
+                if model:
+                    env['CLAUDE_MODEL'] = model
+                if api_key:
+                    env['ANTHROPIC_API_KEY'] = api_key
+                try:
+                    self.claude_client = LLMClientFactory.from_environment(env)
+                except ValueError:
+                    # Fallback to Anthropic for backward compatibility
+                    logger.warning("Using Anthropic API as fallback due to invalid environment configuration")
                     self.claude_client = LLMClientFactory.create_client_from_dict(
-                        provider=provider,
+                        provider='anthropic',
                         model=model,
                         api_key=api_key
                     )
-                else:
-                    # Use environment-based configuration or fall back to Anthropic
-                    try:
-                        self.claude_client = LLMClientFactory.from_environment()
-                    except ValueError:
-                        # Fallback to Anthropic for backward compatibility
-                        logger.warning("Using Anthropic API as fallback due to invalid environment configuration")
-                        self.claude_client = LLMClientFactory.create_client_from_dict(
-                            provider='anthropic',
-                            model=model,
-                            api_key=api_key
-                        )
                 
-                # Validate API access
-                valid, error = self.claude_client.validate_api_access()
+                # Validate API access (reuses the factory's pre-warm call if running)
+                valid, error = self.claude_client.wait_for_validation()
                 if not valid:
                     logger.warning(f"LLM API validation failed: {error}")
                     self.claude_client = None
@@ -278,15 +282,18 @@ class FindingsFilter:
         excluded_claude = []
         
         if self.use_claude_filtering and self.claude_client and findings_after_hard:
-            # Process findings individually
-            logger.info(f"Processing {len(findings_after_hard)} findings individually through Claude API")
+            # Process findings individually, with up to max_concurrency requests in flight
+            logger.info(f"Processing {len(findings_after_hard)} findings individually through Claude API "
+                        f"(concurrency {self.max_concurrency})")
             
-            for orig_idx, finding in findings_after_hard:
-                # Call Claude API for single finding
-                success, analysis_result, error_msg = self.claude_client.analyze_single_finding(
-                    finding, pr_context, self.custom_filtering_instructions
-                )
-                
+            analysis_results = self.claude_client.analyze_findings_concurrently(
+                [finding for _, finding in findings_after_hard],
+                pr_context,
+                self.custom_filtering_instructions,
+                concurrency=self.max_concurrency
+            )
+            
+            for (orig_idx, finding), (success, analysis_result, error_msg) in zip(findings_after_hard, analysis_results):
                 if success and analysis_result:
                     # Process Claude's analysis for single finding
                     confidence = analysis_result.get('confidence_score', 10.0)
@@ -20,10 +20,12 @@ from claudecode.findings_filter import FindingsFilter
 from claudecode.json_parser import parse_json_with_fallbacks
 from claudecode.constants import (
     EXIT_CONFIGURATION_ERROR,
-    DEFAULT_CLAUDE_MODEL,
+    default_claude_model,
+    default_llm_provider,
     EXIT_SUCCESS,
     EXIT_GENERAL_ERROR,
-    SUBPROCESS_TIMEOUT
+    SUBPROCESS_TIMEOUT,
+    DEFAULT_MAX_CONCURRENCY
 )
 from claudecode.logger import get_logger
 
@@ -224,7 +226,7 @@ class SimpleClaudeRunner:
             cmd = [
                 'claude',
                 '--output-format', 'json',
-                '--model', DEFAULT_CLAUDE_MODEL
+                '--model', default_claude_model()
             ]
             
             # Run Claude Code with retry logic
@@ -393,6 +395,24 @@ def initialize_clients() -> Tuple[GitHubActionClient, SimpleClaudeRunner]:
     return github_client, claude_runner
 
 
+def _positive_int_env(name: str, default: int) -> int:
+    """Read a positive integer setting from the environment.
+    
+    Raises:
+        ConfigurationError: If the variable is set to anything but a positive integer
+    """
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ConfigurationError(f'Invalid {name}: {value}')
+    if number < 1:
+        raise ConfigurationError(f'Invalid {name}: {value} (must be at least 1)')
+    return number
+
+
 def initialize_findings_filter(custom_filtering_instructions: Optional[str] = None) -> FindingsFilter:
     """Initialize findings filter based on environment configuration.
     
@@ -410,9 +430,10 @@ def initialize_findings_filter(custom_filtering_instructions: Optional[str] = No
         use_claude_filtering = os.environ.get('ENABLE_CLAUDE_FILTERING', 'false').lower() == 'true'
         
         # Get provider configuration
-        provider = os.environ.get('LLM_PROVIDER', 'anthropic').lower()
+        provider = default_llm_provider()
         api_key = os.environ.get('ANTHROPIC_API_KEY')
         model = os.environ.get('CLAUDE_MODEL')
+        max_concurrency = _positive_int_env('LLM_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY)
         
         if use_claude_filtering:
             # Use full filtering with LLM API
@@ -422,7 +443,8 @@ def initialize_findings_filter(custom_filtering_instructions: Optional[str] = No
                 api_key=api_key,
                 model=model,
                 custom_filtering_instructions=custom_filtering_instructions,
-                provider=provider
+                provider=provider,
+                max_concurrency=max_concurrency
             )
         else:
             # Fallback to filtering with hard rules only
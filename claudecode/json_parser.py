@@ -5,9 +5,157 @@ import json
 import re
 import logging
 
+import orjson
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Markdown code fences around a model's JSON output (```json ... ```)
+_FENCE_PATTERN = re.compile(r"^```(?:json)?\n?|```$", re.M)
+_JSON_BLOCK_PATTERN = re.compile(r'```json\s*(.*?)\s*```', re.DOTALL)
+_BARE_BLOCK_PATTERN = re.compile(r'```\s*(\{.*?\})\s*```', re.DOTALL)
+
+
+def json_loads(text):
+    """Parse JSON text with orjson, falling back to the stdlib json module.
+    
+    orjson rejects some input the stdlib accepts (NaN and Infinity literals), and
+    the stdlib raises TypeError rather than a decode error for non-string input.
+    
+    Raises json.JSONDecodeError on invalid input.
+    """
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return json.loads(text)
+
+
+def json_dumps(obj, indent=False):
+    """Serialize an object to a JSON string with orjson.
+    
+    Falls back to the stdlib json module for values orjson cannot serialize,
+    such as integers wider than 64 bits.
+    
+    Args:
+        obj: JSON-serializable object
+        indent: Pretty-print with 2-space indentation
+        
+    Returns:
+        str: JSON text
+    """
+    option = orjson.OPT_NON_STR_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    try:
+        return orjson.dumps(obj, option=option).decode('utf-8')
+    except TypeError:
+        if indent:
+            return json.dumps(obj, indent=2, ensure_ascii=False)
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+
+def matches_json_type(value, json_type=None):
+    """Check whether a parsed JSON value has the shape a caller asked for.
+    
+    Args:
+        value: Parsed JSON value
+        json_type: dict for an object, list for an array of objects (such as
+            batch verdicts), or None to accept either
+        
+    Returns:
+        bool: True if the value has the expected shape
+    """
+    if json_type is None:
+        return isinstance(value, (dict, list))
+    if json_type is list:
+        return isinstance(value, list) and all(isinstance(item, dict) for item in value)
+    return isinstance(value, json_type)
+
+
+class JsonCompletionTracker:
+    """Detect when streamed text contains a complete top-level JSON value.
+    
+    Tracks bracket depth across chunks, ignoring brackets inside strings, so a
+    streaming response can be cut off as soon as the JSON object or array the
+    model was asked for has closed. Brackets in prose before the JSON (such as
+    "Verdict [final]:" or a citation like "[1]") are skipped: a candidate only
+    counts as complete if it parses as the expected type, otherwise scanning
+    resumes after its opening bracket.
+    """
+    
+    def __init__(self, json_type=None):
+        """Initialize the tracker.
+        
+        Args:
+            json_type: Expected value type, as for matches_json_type()
+        """
+        self.json_type = json_type
+        self._openers = {dict: '{', list: '['}.get(json_type, '{[')
+        self._reset()
+    
+    def _reset(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+        self._candidate = []
+    
+    def feed(self, chunk):
+        """Consume the next chunk of streamed text.
+        
+        Args:
+            chunk: Text received since the previous call
+            
+        Returns:
+            bool: True once a top-level value of the expected type is complete
+        """
+        pending = chunk
+        while pending:
+            complete, pending = self._scan(pending)
+            if complete:
+                return True
+        return False
+    
+    def _scan(self, text):
+        """Scan text until a candidate value closes.
+        
+        Returns:
+            tuple: (complete, text still to scan after a candidate that did not parse)
+        """
+        for i, char in enumerate(text):
+            if not self.started:
+                if char in self._openers:
+                    self.started = True
+                    self.depth = 1
+                    self._candidate.append(char)
+                continue
+            
+            self._candidate.append(char)
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.depth += 1
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    candidate = ''.join(self._candidate)
+                    try:
+                        if matches_json_type(json_loads(candidate), self.json_type):
+                            return True, ''
+                    except json.JSONDecodeError:
+                        pass
+                    # Not the expected value; look for one starting after this bracket
+                    self._reset()
+                    return False, candidate[1:] + text[i + 1:]
+        return False, ''
+
 
 def extract_json_from_text(text):
     """
@@ -22,14 +170,14 @@ def extract_json_from_text(text):
     try:
         # First, try to extract JSON from markdown code blocks (with or without language tag)
         json_matches = [
-            re.search(r'```json\s*(.*?)\s*```', text, re.DOTALL),
-            re.search(r'```\s*(\{.*?\})\s*```', text, re.DOTALL)
+            _JSON_BLOCK_PATTERN.search(text),
+            _BARE_BLOCK_PATTERN.search(text)
         ]
         
         for json_match in json_matches:
             if json_match:
                 try:
-                    return json.loads(json_match.group(1))
+                    return json_loads(json_match.group(1))
                 except json.JSONDecodeError:
                     continue
         
@@ -48,7 +196,7 @@ def extract_json_from_text(text):
                     # Found a complete JSON object
                     potential_json = text[json_start:i+1]
                     try:
-                        return json.loads(potential_json)
+                        return json_loads(potential_json)
                     except json.JSONDecodeError:
                         # This wasn't valid JSON, continue looking
                         continue
@@ -71,10 +219,18 @@ def parse_json_with_fallbacks(text, error_context=""):
     """
     try:
         # First, try direct JSON parsing
-        return True, json.loads(text)
+        return True, json_loads(text)
     except json.JSONDecodeError:
         pass
     
+    # Models often wrap the whole response in a markdown code fence
+    stripped = _FENCE_PATTERN.sub('', text.strip()).strip()
+    if stripped != text.strip():
+        try:
+            return True, json_loads(stripped)
+        except json.JSONDecodeError:
+            pass
+    
     # Try extracting JSON from text
     extracted_json = extract_json_from_text(text)
     if extracted_json:
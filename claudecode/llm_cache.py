@@ -0,0 +1,170 @@
+"""Caches for LLM responses and finding analysis results."""
+
+import hashlib
+import json
+import math
+import re
+import shelve
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from claudecode.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.97
+EMBEDDING_DIMENSIONS = 512
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+Embedding = List[float]
+
+
+def hashed_ngram_embedding(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> Embedding:
+    """Embed text as an L2-normalized vector of hashed unigram and bigram counts.
+
+    This is a dependency-free stand-in for a neural sentence embedding. It is
+    good enough to match near-identical findings (same rule and snippet with
+    small wording changes), which is what the cache is for.
+
+    Args:
+        text: Text to embed
+        dimensions: Size of the output vector
+
+    Returns:
+        Unit-length embedding vector (all zeros for text without tokens)
+    """
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    vector = [0.0] * dimensions
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], 'little') % dimensions
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[bucket] += sign
+
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm:
+        vector = [v / norm for v in vector]
+    return vector
+
+
+class SemanticPromptCache:
+    """Cache of analysis results looked up by embedding similarity.
+
+    Entries are partitioned by a namespace (typically a hash of the model and
+    system prompt) so results from different models or prompts never mix.
+    """
+
+    def __init__(self,
+                 path: str,
+                 threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+                 embed: Optional[Callable[[str], Embedding]] = None):
+        """Open (or create) the cache database.
+
+        Args:
+            path: SQLite database file path
+            threshold: Minimum cosine similarity for a cache hit
+            embed: Optional embedding function returning unit-length vectors
+                (defaults to hashed_ngram_embedding)
+        """
+        self.path = path
+        self.threshold = threshold
+        self.embed = embed or hashed_ngram_embedding
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS prompt_cache ("
+            " id INTEGER PRIMARY KEY,"
+            " namespace TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " embedding BLOB NOT NULL,"
+            " result TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS prompt_cache_namespace ON prompt_cache (namespace, text_hash)"
+        )
+        self._conn.commit()
+
+    def lookup(self, namespace: str, text: str) -> Optional[Dict[str, Any]]:
+        """Find the cached result for the most similar text in a namespace.
+
+        Args:
+            namespace: Cache partition key
+            text: Text describing the request
+
+        Returns:
+            Cached result if a stored entry meets the threshold, None otherwise
+        """
+        text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM prompt_cache WHERE namespace = ? AND text_hash = ? LIMIT 1",
+                (namespace, text_hash)
+            ).fetchone()
+            if row is not None:
+                return json.loads(row[0])
+            rows = self._conn.execute(
+                "SELECT embedding, result FROM prompt_cache WHERE namespace = ?",
+                (namespace,)
+            ).fetchall()
+
+        if not rows:
+            return None
+
+        query = self.embed(text)
+        best_score = -1.0
+        best_result = None
+        for blob, result in rows:
+            stored = array('d')
+            stored.frombytes(blob)
+            score = sum(a * b for a, b in zip(query, stored))
+            if score > best_score:
+                best_score, best_result = score, result
+
+        if best_score >= self.threshold:
+            logger.info("Semantic cache hit (similarity %.3f)", best_score)
+            return json.loads(best_result)
+        return None
+
+    def store(self, namespace: str, text: str, result: Dict[str, Any]) -> None:
+        """Store a result for a text in a namespace.
+
+        Args:
+            namespace: Cache partition key
+            text: Text describing the request
+            result: JSON-serializable result to cache
+        """
+        text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        embedding = array('d', self.embed(text)).tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO prompt_cache (namespace, text_hash, embedding, result) VALUES (?, ?, ?, ?)",
+                (namespace, text_hash, embedding, json.dumps(result))
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def open_response_store(path: str) -> shelve.Shelf:
+    """Open a persistent store for exact-match LLM responses.
+
+    Args:
+        path: Shelve database path (e.g. ~/.cache/claudecode/exact.db)
+
+    Returns:
+        Open shelf mapping cache keys to (success, response_text, error_message)
+    """
+    path = str(Path(path).expanduser())
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    return shelve.open(path)
@@ -1,8 +1,81 @@
 """Abstract base class for Large Language Model API clients."""
 
+import os
+import asyncio
+import json
+import logging
+import hashlib
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Tuple, Optional
+import random
+import shelve
+import time
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Any, List, Tuple, Optional
 from enum import Enum
+from pathlib import Path
+
+from claudecode.constants import (
+    PROMPT_TOKEN_LIMIT, RATE_LIMIT_BACKOFF_MAX, RETRY_BACKOFF_BASE, DEFAULT_MAX_CONCURRENCY,
+)
+from claudecode.json_parser import JsonCompletionTracker, matches_json_type, parse_json_with_fallbacks, json_dumps
+from claudecode.llm_cache import SemanticPromptCache
+from claudecode.rate_limit import TokenBucket
+from claudecode.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Error message fragments used by the providers' SDKs for throttling responses
+_RATE_LIMIT_MARKERS = ("rate limit", "429", "quota", "throttling", "toomanyrequests", "overloaded")
+
+# Seconds close() waits for the background event loop to release the async client
+_LOOP_SHUTDOWN_TIMEOUT = 5.0
+
+# Client errors that will not succeed on retry (408/409/429 are retryable)
+_NON_RETRYABLE_STATUS_CODES = frozenset(range(400, 500)) - {408, 409, 429}
+
+DEFAULT_FILTERING_INSTRUCTIONS = """HARD EXCLUSIONS - Automatically exclude findings matching these patterns:
+1. Denial of Service (DOS) vulnerabilities or resource exhaustion attacks
+2. Secrets/credentials stored on disk (these are managed separately) 
+3. Rate limiting concerns or service overload scenarios (services don't need to implement rate limiting)
+4. Memory consumption or CPU exhaustion issues
+5. Lack of input validation on non-security-critical fields without proven security impact
+6. Input sanitization concerns for github action workflows
+7. A lack of hardening measures. Code is not expected to implement all security best practices, just avoid obvious vulnerabilities.
+8. Race conditions or timing attacks that are theoretical rather than practical issues. Only report a race condition if it is extremely problematic.
+9. Vulnerabilities related to outdated third-party libraries. These are managed separately and should not be reported here.
+10. Memory safety issues such as buffer overflows or use-after-free-vulnerabilities are impossible in rust. Do not report memory safety issues in rust code.
+11. Files that are only unit tests or only used as part of running tests.
+12. Log spoofing concerns. Outputing un-sanitized user input to logs is not a vulnerability.
+13. SSRF vulnerabilities that only control the path. SSRF is only a concern if it can control the host or protocol.
+14. Including user-controlled content in AI system prompts is not a vulnerability. In general, the inclusion of user input in an AI prompt is not a vulnerability.
+15. Do not report issues related to adding a dependency to a project that is not available from the relevant package repository. Depending on internal libraries that are not publicly available is not a vulnerability.
+16. Do not report issues that cause the code to crash, but are not actually a vulnerability. E.g. a variable that is undefined or null is not a vulnerability.
+
+SIGNAL QUALITY CRITERIA - For remaining findings, assess:
+1. Is there a concrete, exploitable vulnerability with a clear attack path?
+2. Does this represent a real security risk vs theoretical best practice?
+3. Are there specific code locations and reproduction steps?
+4. Would this finding be actionable for a security team?
+
+PRECEDENTS - 
+1. Logging high value secrets in plaintext is a vulnerability. Otherwise, do not report issues around theoretical exposures of secrets. Logging URLs is assumed to be safe. Logging request headers is assumed to be dangerous since they likely contain credentials.
+2. UUIDs can be assumed to be unguessable and do not need to be validated. If a vulnerabilities requires guessing a UUID, it is not a valid vulnerability.
+3. Audit logs are not a critical security feature and should not be reported as a vulnerability if they are missing or modified.
+4. Environment variables and CLI flags are trusted values. Attackers are not able to modify them in a secure environment. Any attack that relies on controlling an environment variable is invalid.
+5. Resource management issues such as memory or file descriptor leaks are not valid.
+6. Subtle or low impact web vulnerabilities such as tabnabbing, XS-Leaks, prototype pollution, and open redirects are not valid.
+7. Vulnerabilities related to outdated third-party libraries. These are managed separately and should not be reported here.
+8. React is generally secure against XSS. React does not need to sanitize or escape user input unless it is using dangerouslySetInnerHTML or similar methods. Do not report XSS vulnerabilities in React components or tsx files unless they are using unsafe methods.
+9. Most vulnerabilities in github action workflows are not exploitable in practice. Before validating a github action workflow vulnerability ensure it is concrete and has a very specific attack path.
+10. A lack of permission checking or authentication in client-side TS code is not a vulnerability. Client-side code is not trusted and does not need to implement these checks, they are handled on the server-side. The same applies to all flows that send untrusted data to the backend, the backend is responsible for validating and sanitizing all inputs.
+11. Only include MEDIUM findings if they are obvious and concrete issues.
+12. Most vulnerabilities in ipython notebooks (*.ipynb files) are not exploitable in practice. Before validating a notebook vulnerability ensure it is concrete and has a very specific attack path.
+13. Logging non-PII data is not a vulnerability even if the data may be sensitive. Only report logging vulnerabilities if they expose sensitive information such as secrets, passwords, or personally identifiable information (PII).
+14. Command injection vulnerabilities in shell scripts are generally not exploitable in practice since shell scripts generally do not run with untrusted user input. Only report command injection vulnerabilities in shell scripts if they are concrete and have a very specific attack path for untrusted input.
+15. SSRF (Server-Side Request Forgery) vulnerabilities in client-side JavaScript/TypeScript files (.js, .ts, .tsx, .jsx) are not valid since client-side code cannot make server-side requests that would bypass firewalls or access internal resources. Only report SSRF in server-side code (e.g. Python or JS that is known to run on the server-side). The same logic applies to path-traversal attacks, they are not a problem in client-side JS.
+16. Path traversal attacks using ../ are generally not a problem when triggering HTTP requests. These are generally only relevant when reading files where the ../ may allow accessing unintended files.
+17. Injecting into log queries is generally not an issue. Only report this if the injection will definitely lead to exposing sensitive data to external users."""
 
 
 class CloudProvider(Enum):
@@ -20,6 +93,12 @@ class LLMAPIClient(ABC):
     while maintaining a consistent interface.
     """
     
+    # Whether the provider accepts cache_control on system prompt blocks
+    supports_prompt_caching = True
+    
+    # Provider name as written in log and error messages
+    provider_label = "LLM"
+    
     def __init__(self, 
                  model: Optional[str] = None,
                  timeout_seconds: Optional[int] = None,
@@ -34,6 +113,461 @@ class LLMAPIClient(ABC):
         self.model = model
         self.timeout_seconds = timeout_seconds
         self.max_retries = max_retries
+        self._validation_future: Optional[Future] = None
+        self.prompt_cache: Optional[SemanticPromptCache] = None
+        
+        # Exact-match response cache for call_with_retry, optionally backed by disk
+        self._exact_cache: Dict[str, Tuple[bool, str, str]] = {}
+        self._exact_cache_lock = threading.Lock()
+        self.exact_cache_store: Optional[shelve.Shelf] = None
+        
+        # Client-side request throttling, attached by LLMClientFactory
+        self.rate_limiter: Optional[TokenBucket] = None
+        
+        # System prompts are static per filtering instructions, so build each once
+        self._system_prompts: Dict[Optional[str], str] = {}
+        self._system_prompt_blocks: Dict[str, List[Dict[str, Any]]] = {}
+        
+        # Async SDK client, created lazily per event loop by _get_async_client()
+        self.http_client_options: Optional[Dict[str, Any]] = None
+        self._async_client: Optional[Any] = None
+        self._async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # Background event loop for analyze_findings_concurrently(), kept until
+        # close() so the async client and its connection pool outlive each call
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        
+        # Set by LLMClientFactory while the client sits in its shared cache
+        self._shared = False
+    
+    def prewarm(self) -> None:
+        """Run validate_api_access() in a background thread.
+        
+        This opens the TLS connection while the caller is still doing other setup,
+        so the first real request finds a warm connection pool. The outcome is
+        available through wait_for_validation().
+        """
+        if self._validation_future is not None:
+            return
+        
+        future: Future = Future()
+        
+        def _run() -> None:
+            try:
+                future.set_result(self._validate_throttled())
+            except Exception as e:
+                future.set_result((False, f"API validation failed: {str(e)}"))
+        
+        self._validation_future = future
+        threading.Thread(target=_run, name=f"{self.provider_name}-prewarm", daemon=True).start()
+    
+    def wait_for_validation(self) -> Tuple[bool, str]:
+        """Get the API validation result, reusing a pre-warm call if one was started.
+        
+        Only a successful pre-warm result is kept. A failure (which may be a
+        transient timeout or 5xx) is returned once and then dropped, so the next
+        call validates again instead of disabling every later caller.
+        
+        Returns:
+            Tuple of (success, error_message), as returned by validate_api_access()
+        """
+        future = self._validation_future
+        if future is None:
+            result = self._validate_throttled()
+            if result[0]:
+                future = Future()
+                future.set_result(result)
+                self._validation_future = future
+            return result
+        result = future.result()
+        if not result[0] and self._validation_future is future:
+            self._validation_future = None
+        return result
+    
+    def _validate_throttled(self) -> Tuple[bool, str]:
+        """Call validate_api_access() once the rate limiter (if attached) allows a request."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return self.validate_api_access()
+    
+    def close(self) -> None:
+        """Release the underlying SDK client and its HTTP connection pool.
+        
+        Safe to call more than once. Clients handed out by LLMClientFactory are
+        shared process-wide, so for them this (and leaving a with block) does
+        nothing; clear_client_cache() releases them.
+        """
+        if getattr(self, '_shared', False):
+            return
+        self._release()
+    
+    def _release(self) -> None:
+        """Release all resources held by the client, shared or not."""
+        client = getattr(self, 'client', None)
+        if client is not None and hasattr(client, 'close'):
+            client.close()
+        self.client = None
+        
+        http_client = getattr(self, 'http_client', None)
+        if http_client is not None:
+            http_client.close()
+        self.http_client = None
+        
+        prompt_cache = getattr(self, 'prompt_cache', None)
+        if prompt_cache is not None:
+            prompt_cache.close()
+        self.prompt_cache = None
+        
+        exact_cache_store = getattr(self, 'exact_cache_store', None)
+        if exact_cache_store is not None:
+            exact_cache_store.close()
+        self.exact_cache_store = None
+        
+        self._stop_loop()
+        
+        # Any other async client can only be closed from its event loop; see aclose()
+        self._async_client = None
+        self._async_client_loop = None
+    
+    async def aclose(self) -> None:
+        """Release the async SDK client and its HTTP connection pool.
+        
+        Must be awaited on the event loop that used the client. The sync client
+        is left open.
+        """
+        async_client = getattr(self, '_async_client', None)
+        self._async_client = None
+        self._async_client_loop = None
+        if async_client is not None:
+            await async_client.close()
+    
+    def _get_async_client(self) -> Any:
+        """Get the async SDK client for the running event loop, creating it on first use.
+        
+        httpx async connection pools are bound to the loop they were used on, so
+        a new client is created when called from a different loop (e.g. a new
+        asyncio.run()).
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = self._create_async_client()
+            self._async_client_loop = loop
+        return self._async_client
+    
+    def _run_on_loop(self, coro: Awaitable[Any]) -> Any:
+        """Run a coroutine on the client's background event loop and wait for its result.
+        
+        The loop thread is started on first use and runs until close(), so the
+        async client created on it is reused by every later call.
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name=f"{self.provider_name}-async", daemon=True)
+                thread.start()
+                self._loop, self._loop_thread = loop, thread
+            loop = self._loop
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+    
+    def _stop_loop(self) -> None:
+        """Close the async client on the background event loop, then stop the loop."""
+        loop = getattr(self, '_loop', None)
+        thread = getattr(self, '_loop_thread', None)
+        self._loop = None
+        self._loop_thread = None
+        if loop is None:
+            return
+        if thread is threading.current_thread():
+            # Called from a coroutine on the loop itself; it cannot wait for itself
+            loop.call_soon_threadsafe(loop.stop)
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result(timeout=_LOOP_SHUTDOWN_TIMEOUT)
+        except Exception as e:
+            logger.warning("Failed to close async LLM client: %s", e)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=_LOOP_SHUTDOWN_TIMEOUT)
+            if not loop.is_running():
+                loop.close()
+    
+    def _build_async_http_client(self) -> Optional[Any]:
+        """Build an async httpx client using the options attached by LLMClientFactory.
+        
+        Returns:
+            DefaultAsyncHttpxClient instance, or None to use the SDK default
+        """
+        if self.http_client_options is None:
+            return None
+        from anthropic import DefaultAsyncHttpxClient
+        
+        return DefaultAsyncHttpxClient(**self.http_client_options, timeout=self.timeout_seconds)
+    
+    def __enter__(self) -> "LLMAPIClient":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
+    def _message_params(self, prompt: str, system_prompt: Optional[str], max_tokens: int) -> Dict[str, Any]:
+        """Build messages.create() parameters for a single-turn request."""
+        api_params = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}],
+            "timeout": self.timeout_seconds
+        }
+        
+        if system_prompt:
+            api_params["system"] = self._system_param(system_prompt)
+        return api_params
+    
+    def _system_param(self, system_prompt: str) -> Any:
+        """Get the messages.create() system parameter for a system prompt.
+        
+        When the provider supports prompt caching, the system prompt is sent as
+        a text block marked for ephemeral caching, so repeated requests with the
+        same instructions reuse the server-side cache instead of re-processing
+        them. The block list is built once per distinct system prompt.
+        """
+        if not self.supports_prompt_caching:
+            return system_prompt
+        blocks = self._system_prompt_blocks.get(system_prompt)
+        if blocks is None:
+            blocks = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+            self._system_prompt_blocks[system_prompt] = blocks
+        return blocks
+    
+    @staticmethod
+    def _response_text(response: Any) -> str:
+        """Concatenate the text blocks of a messages.create() response."""
+        response_text = ""
+        for content_block in response.content:
+            if hasattr(content_block, 'text'):
+                response_text += content_block.text
+        return response_text
+    
+    def _stream_json_text(self, client: Any, api_params: Dict[str, Any], json_type: type = dict) -> str:
+        """Stream a response and stop reading once it holds a complete JSON value.
+        
+        Leaving the stream context closes the connection, so tokens the model
+        would generate after the closing bracket are never waited for. If the
+        text read up to that point does not parse as json_type, the rest of the
+        response is read instead.
+        """
+        tracker = JsonCompletionTracker(json_type)
+        chunks = []
+        with client.messages.stream(**api_params) as stream:
+            for text in stream.text_stream:
+                chunks.append(text)
+                if tracker is not None and tracker.feed(text):
+                    if self._is_json_response("".join(chunks), json_type):
+                        break
+                    tracker = None
+        return "".join(chunks)
+    
+    async def _astream_json_text(self, client: Any, api_params: Dict[str, Any], json_type: type = dict) -> str:
+        """Async version of _stream_json_text()."""
+        tracker = JsonCompletionTracker(json_type)
+        chunks = []
+        async with client.messages.stream(**api_params) as stream:
+            async for text in stream.text_stream:
+                chunks.append(text)
+                if tracker is not None and tracker.feed(text):
+                    if self._is_json_response("".join(chunks), json_type):
+                        break
+                    tracker = None
+        return "".join(chunks)
+    
+    @staticmethod
+    def _is_json_response(text: str, json_type: type) -> bool:
+        """Check whether response text parses (with fallbacks) as a JSON value of json_type."""
+        success, value = parse_json_with_fallbacks(text)
+        return success and matches_json_type(value, json_type)
+    
+    def _exact_cache_key(self, prompt: str, system_prompt: Optional[str], max_tokens: int,
+                         stream: bool = False, json_type: type = dict) -> str:
+        """Build the exact-match cache key for a call_with_retry request."""
+        key = f"{self.model}\x00{system_prompt or ''}\x00{prompt}\x00{max_tokens}"
+        if stream:
+            # Streamed responses are cut off after the JSON value, so keep them apart
+            key += f"\x00stream\x00{json_type.__name__}"
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+    
+    def _get_cached_response(self, cache_key: str) -> Optional[Tuple[bool, str, str]]:
+        """Get a cached call_with_retry result, checking memory before disk."""
+        with self._exact_cache_lock:
+            result = self._exact_cache.get(cache_key)
+            if result is None and self.exact_cache_store is not None:
+                result = self.exact_cache_store.get(cache_key)
+                if result is not None:
+                    self._exact_cache[cache_key] = result
+        if result is not None:
+            logger.info("Using cached response for identical LLM request")
+        return result
+    
+    def _store_cached_response(self, cache_key: str, result: Tuple[bool, str, str],
+                               json_type: Optional[type] = None) -> None:
+        """Cache a successful call_with_retry result in memory and on disk.
+        
+        When json_type is given (streamed JSON requests), the response is only
+        cached if it parses as that type, so a truncated or malformed answer is
+        never replayed or persisted.
+        """
+        if json_type is not None and not self._is_json_response(result[1], json_type):
+            logger.warning("Not caching %s response that does not parse as JSON", self.provider_name)
+            return
+        with self._exact_cache_lock:
+            self._exact_cache[cache_key] = result
+            if self.exact_cache_store is not None:
+                self.exact_cache_store[cache_key] = result
+    
+    def retry(self, call: Callable[[], str]) -> Tuple[bool, str, str]:
+        """Run an API call, retrying transient failures with jittered backoff.
+        
+        Args:
+            call: Function performing one API request and returning the response text
+            
+        Returns:
+            Tuple of (success, response_text, error_message)
+        """
+        attempts = self.max_retries + 1
+        delay = RETRY_BACKOFF_BASE
+        last_error: Optional[Exception] = None
+        
+        for attempt in range(attempts):
+            try:
+                self._log_attempt(attempt, attempts)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                return True, call(), ""
+            except Exception as e:
+                last_error = e
+                if not self._should_retry(e, attempt, attempts):
+                    break
+                delay = self._sleep_backoff(attempt, delay, self._retry_after_seconds(e))
+        
+        return False, "", self._failure_message(last_error, attempt + 1)
+    
+    async def aretry(self, call: Callable[[], Awaitable[str]]) -> Tuple[bool, str, str]:
+        """Async version of retry() that waits without blocking the event loop.
+        
+        Args:
+            call: Coroutine function performing one API request and returning the response text
+            
+        Returns:
+            Tuple of (success, response_text, error_message)
+        """
+        attempts = self.max_retries + 1
+        delay = RETRY_BACKOFF_BASE
+        last_error: Optional[Exception] = None
+        
+        for attempt in range(attempts):
+            try:
+                self._log_attempt(attempt, attempts)
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.aacquire()
+                return True, await call(), ""
+            except Exception as e:
+                last_error = e
+                if not self._should_retry(e, attempt, attempts):
+                    break
+                delay = self._backoff_delay(attempt, delay, self._retry_after_seconds(e))
+                await asyncio.sleep(delay)
+        
+        return False, "", self._failure_message(last_error, attempt + 1)
+    
+    @staticmethod
+    def _failure_message(error: Exception, attempts_made: int) -> str:
+        """Describe a failed API call, with the number of attempts actually made."""
+        plural = "attempt" if attempts_made == 1 else "attempts"
+        if getattr(error, 'status_code', None) in _NON_RETRYABLE_STATUS_CODES:
+            return f"API call failed (non-retryable) after {attempts_made} {plural}: {error}"
+        return f"API call failed after {attempts_made} {plural}: {error}"
+    
+    def _log_attempt(self, attempt: int, attempts: int) -> None:
+        """Log an API call attempt; first attempts only at DEBUG, since every request makes one."""
+        if attempt:
+            logger.info("%s API call attempt %d/%d", self.provider_name, attempt + 1, attempts)
+        elif logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s API call attempt %d/%d", self.provider_name, attempt + 1, attempts)
+    
+    def _should_retry(self, error: Exception, attempt: int, attempts: int) -> bool:
+        """Log a failed attempt and decide whether another attempt is worthwhile.
+        
+        Args:
+            error: Exception raised by the attempt
+            attempt: Zero-based number of the attempt that failed
+            attempts: Total number of attempts allowed
+            
+        Returns:
+            True if the call should be retried
+        """
+        error_msg = str(error)
+        logger.error("%s API call failed: %s", self.provider_name, error_msg)
+        
+        if getattr(error, 'status_code', None) in _NON_RETRYABLE_STATUS_CODES:
+            return False
+        if attempt == attempts - 1:
+            return False
+        
+        if self._is_rate_limit_error(error):
+            logger.warning("Rate limit detected, backing off")
+        elif "timeout" in error_msg.lower() or type(error).__name__ == "APITimeoutError":
+            logger.warning("Timeout detected, retrying")
+        return True
+    
+    def _sleep_backoff(self, attempt: int, prev_delay: float, retry_after: Optional[float] = None) -> float:
+        """Sleep before the next retry using decorrelated jitter backoff.
+        
+        Args:
+            attempt: Zero-based number of the attempt that just failed
+            prev_delay: Delay used before the previous attempt
+            retry_after: Server-requested delay from a Retry-After header, if any
+            
+        Returns:
+            The delay slept, to be passed as prev_delay on the next call
+        """
+        delay = self._backoff_delay(attempt, prev_delay, retry_after)
+        time.sleep(delay)
+        return delay
+    
+    def _backoff_delay(self, attempt: int, prev_delay: float, retry_after: Optional[float] = None) -> float:
+        """Pick the next retry delay using decorrelated jitter backoff (see _sleep_backoff)."""
+        delay = min(RATE_LIMIT_BACKOFF_MAX, random.uniform(RETRY_BACKOFF_BASE, prev_delay * 3))
+        if retry_after is not None:
+            delay = min(RATE_LIMIT_BACKOFF_MAX, max(delay, retry_after))
+        logger.info("Retrying in %.1fs (after attempt %d)", delay, attempt + 1)
+        return delay
+    
+    @staticmethod
+    def _is_rate_limit_error(error: Exception) -> bool:
+        """Check whether an SDK exception indicates rate limiting or overload."""
+        if getattr(error, 'status_code', None) in (429, 503, 529):
+            return True
+        error_msg = str(error).lower()
+        return any(marker in error_msg for marker in _RATE_LIMIT_MARKERS)
+    
+    @staticmethod
+    def _retry_after_seconds(error: Exception) -> Optional[float]:
+        """Get the Retry-After delay in seconds from an SDK exception's response."""
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None)
+        if not headers:
+            return None
+        try:
+            value = headers.get('retry-after')
+            return max(0.0, float(value)) if value is not None else None
+        except (TypeError, ValueError):
+            return None
     
     @abstractmethod
     def validate_api_access(self) -> Tuple[bool, str]:
@@ -52,16 +586,24 @@ class LLMAPIClient(ABC):
     def call_with_retry(self, 
                        prompt: str,
                        system_prompt: Optional[str] = None,
-                       max_tokens: int = 16384) -> Tuple[bool, str, str]:
+                       max_tokens: int = 16384,
+                       stream: bool = False,
+                       json_type: type = dict) -> Tuple[bool, str, str]:
         """Make LLM API call with retry logic.
         
         Executes the API call with automatic retry handling for transient failures,
-        rate limiting, and timeouts.
+        rate limiting, and timeouts. Successful results are cached by
+        (model, system_prompt, prompt, max_tokens), so identical requests are
+        answered without calling the API again.
         
         Args:
             prompt: User prompt to send to the model
             system_prompt: Optional system prompt to set model behavior
             max_tokens: Maximum tokens to generate in response
+            stream: Stream the response and stop as soon as it contains a
+                complete JSON value (for prompts that expect JSON)
+            json_type: Expected streamed value: dict for an object, list for an
+                array of objects (ignored unless stream is set)
             
         Returns:
             Tuple of (success, response_text, error_message)
@@ -98,6 +640,309 @@ class LLMAPIClient(ABC):
         """
         pass
     
+    async def acall_with_retry(self,
+                               prompt: str,
+                               system_prompt: Optional[str] = None,
+                               max_tokens: int = PROMPT_TOKEN_LIMIT,
+                               stream: bool = False,
+                               json_type: type = dict) -> Tuple[bool, str, str]:
+        """Async version of call_with_retry().
+        
+        Uses the provider's async SDK client so many requests can be in flight at
+        once. Shares the exact-match cache and rate limiter with call_with_retry().
+        
+        Args:
+            prompt: User prompt to send to the model
+            system_prompt: Optional system prompt to set model behavior
+            max_tokens: Maximum tokens to generate in response
+            stream: Stream and stop once the JSON response is complete (see call_with_retry)
+            json_type: Expected streamed value (see call_with_retry)
+            
+        Returns:
+            Tuple of (success, response_text, error_message)
+        """
+        cache_key = self._exact_cache_key(prompt, system_prompt, max_tokens, stream, json_type)
+        cached_result = self._get_cached_response(cache_key)
+        if cached_result is not None:
+            return cached_result
+        
+        async_client = self._get_async_client()
+        
+        async def _create_message() -> str:
+            api_params = self._message_params(prompt, system_prompt, max_tokens)
+            start_time = time.time()
+            if stream:
+                response_text = await self._astream_json_text(async_client, api_params, json_type)
+            else:
+                response_text = self._response_text(await async_client.messages.create(**api_params))
+            duration = time.time() - start_time
+            
+            logger.info("%s API call successful in %.1fs", self.provider_label, duration)
+            return response_text
+        
+        result = await self.aretry(_create_message)
+        if result[0]:
+            self._store_cached_response(cache_key, result, json_type if stream else None)
+        return result
+    
+    async def aanalyze_single_finding(self,
+                                      finding: Dict[str, Any],
+                                      pr_context: Optional[Dict[str, Any]] = None,
+                                      custom_filtering_instructions: Optional[str] = None) -> Tuple[bool, Dict[str, Any], str]:
+        """Async version of analyze_single_finding().
+        
+        Args:
+            finding: Single security finding dictionary to analyze
+            pr_context: Optional PR context for better analysis
+            custom_filtering_instructions: Optional custom filtering rules to apply
+            
+        Returns:
+            Tuple of (success, analysis_result, error_message)
+        """
+        try:
+            prompt = self._generate_single_finding_prompt(finding, pr_context, custom_filtering_instructions)
+            system_prompt = self._generate_system_prompt(custom_filtering_instructions)
+            
+            success, response_text, error_msg = await self.acall_with_retry(
+                prompt=prompt,
+                system_prompt=system_prompt,
+                max_tokens=PROMPT_TOKEN_LIMIT,
+                stream=True
+            )
+            
+            if not success:
+                return False, {}, error_msg
+            
+            success, analysis_result = parse_json_with_fallbacks(response_text, f"{self.provider_label} API response")
+            if success:
+                logger.info("Successfully parsed %s API response for single finding", self.provider_label)
+                return True, analysis_result, ""
+            else:
+                return False, {}, "Failed to parse JSON response"
+                
+        except Exception as e:
+            logger.exception("Error during single finding security analysis: %s", e)
+            return False, {}, f"Single finding security analysis failed: {str(e)}"
+    
+    @abstractmethod
+    def _create_async_client(self) -> Any:
+        """Create the provider's async SDK client.
+        
+        Called by _get_async_client() on first use in each event loop.
+        """
+        pass
+    
+    def analyze_single_finding_cached(self,
+                                      finding: Dict[str, Any],
+                                      pr_context: Optional[Dict[str, Any]] = None,
+                                      custom_filtering_instructions: Optional[str] = None) -> Tuple[bool, Dict[str, Any], str]:
+        """Analyze a single finding, reusing results for near-identical findings.
+        
+        Looks the finding up in prompt_cache (if one is attached) before calling
+        analyze_single_finding(), and stores successful results. Without a cache
+        this is the same as calling analyze_single_finding() directly.
+        
+        Args:
+            finding: Single security finding dictionary to analyze
+            pr_context: Optional PR context for better analysis
+            custom_filtering_instructions: Optional custom filtering rules to apply
+            
+        Returns:
+            Tuple of (success, analysis_result, error_message)
+        """
+        if self.prompt_cache is None:
+            return self.analyze_single_finding(finding, pr_context, custom_filtering_instructions)
+        
+        namespace, cache_text = self._prompt_cache_entry(finding, custom_filtering_instructions)
+        cached_result = self._lookup_prompt_cache(namespace, cache_text)
+        if cached_result is not None:
+            return True, cached_result, ""
+        
+        success, analysis_result, error_msg = self.analyze_single_finding(
+            finding, pr_context, custom_filtering_instructions
+        )
+        if success:
+            self._store_prompt_cache(namespace, cache_text, analysis_result)
+        return success, analysis_result, error_msg
+    
+    async def aanalyze_single_finding_cached(self,
+                                             finding: Dict[str, Any],
+                                             pr_context: Optional[Dict[str, Any]] = None,
+                                             custom_filtering_instructions: Optional[str] = None) -> Tuple[bool, Dict[str, Any], str]:
+        """Async version of analyze_single_finding_cached().
+        
+        Args:
+            finding: Single security finding dictionary to analyze
+            pr_context: Optional PR context for better analysis
+            custom_filtering_instructions: Optional custom filtering rules to apply
+            
+        Returns:
+            Tuple of (success, analysis_result, error_message)
+        """
+        if self.prompt_cache is None:
+            return await self.aanalyze_single_finding(finding, pr_context, custom_filtering_instructions)
+        
+        namespace, cache_text = self._prompt_cache_entry(finding, custom_filtering_instructions)
+        cached_result = self._lookup_prompt_cache(namespace, cache_text)
+        if cached_result is not None:
+            return True, cached_result, ""
+        
+        success, analysis_result, error_msg = await self.aanalyze_single_finding(
+            finding, pr_context, custom_filtering_instructions
+        )
+        if success:
+            self._store_prompt_cache(namespace, cache_text, analysis_result)
+        return success, analysis_result, error_msg
+    
+    def _prompt_cache_entry(self,
+                            finding: Dict[str, Any],
+                            custom_filtering_instructions: Optional[str]) -> Tuple[str, str]:
+        """Build the prompt cache (namespace, text) pair for a finding."""
+        namespace = hashlib.sha256(
+            f"{self.model}\x00{self._generate_system_prompt(custom_filtering_instructions)}".encode('utf-8')
+        ).hexdigest()
+        cache_text = json.dumps(finding, sort_keys=True) + (custom_filtering_instructions or "")
+        return namespace, cache_text
+    
+    def _lookup_prompt_cache(self, namespace: str, cache_text: str) -> Optional[Dict[str, Any]]:
+        """Look a finding up in prompt_cache, treating cache errors as misses."""
+        try:
+            return self.prompt_cache.lookup(namespace, cache_text)
+        except Exception as e:
+            logger.warning("Prompt cache lookup failed: %s", e)
+            return None
+    
+    def _store_prompt_cache(self, namespace: str, cache_text: str, analysis_result: Dict[str, Any]) -> None:
+        """Store an analysis result in prompt_cache, logging cache errors."""
+        try:
+            self.prompt_cache.store(namespace, cache_text, analysis_result)
+        except Exception as e:
+            logger.warning("Prompt cache store failed: %s", e)
+    
+    async def analyze_many(self,
+                           findings: List[Dict[str, Any]],
+                           pr_context: Optional[Dict[str, Any]] = None,
+                           custom_filtering_instructions: Optional[str] = None,
+                           concurrency: int = DEFAULT_MAX_CONCURRENCY) -> List[Tuple[bool, Dict[str, Any], str]]:
+        """Analyze findings concurrently, one request per finding.
+        
+        At most concurrency requests are in flight at once; the rate limiter
+        (if attached) still applies to each request.
+        
+        Args:
+            findings: Security findings to analyze
+            pr_context: Optional PR context for better analysis
+            custom_filtering_instructions: Optional custom filtering rules to apply
+            concurrency: Maximum number of simultaneous requests
+            
+        Returns:
+            List with one (success, analysis_result, error_message) tuple per
+            finding, in the same order as findings
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def _analyze(finding: Dict[str, Any]) -> Tuple[bool, Dict[str, Any], str]:
+            async with semaphore:
+                try:
+                    return await self.aanalyze_single_finding_cached(
+                        finding, pr_context, custom_filtering_instructions
+                    )
+                except Exception as e:
+                    logger.exception("Error during concurrent security analysis: %s", e)
+                    return False, {}, f"Single finding security analysis failed: {str(e)}"
+        
+        return list(await asyncio.gather(*(_analyze(finding) for finding in findings)))
+    
+    def analyze_findings_concurrently(self,
+                                      findings: List[Dict[str, Any]],
+                                      pr_context: Optional[Dict[str, Any]] = None,
+                                      custom_filtering_instructions: Optional[str] = None,
+                                      concurrency: int = DEFAULT_MAX_CONCURRENCY) -> List[Tuple[bool, Dict[str, Any], str]]:
+        """Run analyze_many() from synchronous code.
+        
+        Runs on the client's background event loop (see _run_on_loop()), so the
+        async client and its connection pool are kept between calls and released
+        by close().
+        
+        Args:
+            findings: Security findings to analyze
+            pr_context: Optional PR context for better analysis
+            custom_filtering_instructions: Optional custom filtering rules to apply
+            concurrency: Maximum number of simultaneous requests
+            
+        Returns:
+            List with one (success, analysis_result, error_message) tuple per finding
+        """
+        return self._run_on_loop(
+            self.analyze_many(findings, pr_context, custom_filtering_instructions, concurrency)
+        )
+    
+    def analyze_findings_batch(self,
+                               findings: List[Dict[str, Any]],
+                               pr_context: Optional[Dict[str, Any]] = None,
+                               custom_filtering_instructions: Optional[str] = None,
+                               batch_size: int = 16) -> List[Tuple[bool, Dict[str, Any], str]]:
+        """Analyze several security findings with one LLM call per batch.
+        
+        Findings are split into chunks of batch_size, and each chunk is sent as a
+        single prompt asking for a JSON array of verdicts keyed by finding_id.
+        Providers may override this to use a provider-specific batch API.
+        
+        Args:
+            findings: Security findings to analyze
+            pr_context: Optional PR context for better analysis
+            custom_filtering_instructions: Optional custom filtering rules to apply
+            batch_size: Maximum number of findings per LLM call
+            
+        Returns:
+            List with one (success, analysis_result, error_message) tuple per
+            finding, in the same order as findings
+        """
+        results: List[Tuple[bool, Dict[str, Any], str]] = []
+        for start in range(0, len(findings), max(1, batch_size)):
+            chunk = findings[start:start + max(1, batch_size)]
+            results.extend(self._analyze_batch_chunk(chunk, pr_context, custom_filtering_instructions))
+        return results
+    
+    def _analyze_batch_chunk(self,
+                             findings: List[Dict[str, Any]],
+                             pr_context: Optional[Dict[str, Any]],
+                             custom_filtering_instructions: Optional[str]) -> List[Tuple[bool, Dict[str, Any], str]]:
+        """Analyze one chunk of findings with a single LLM call."""
+        try:
+            prompt = self._generate_batch_prompt(findings, pr_context, custom_filtering_instructions)
+            success, response_text, error_msg = self.call_with_retry(
+                prompt=prompt,
+                system_prompt=self._generate_system_prompt(custom_filtering_instructions),
+                max_tokens=PROMPT_TOKEN_LIMIT,
+                stream=True,
+                json_type=list
+            )
+            if not success:
+                return [(False, {}, error_msg)] * len(findings)
+            
+            success, verdicts = parse_json_with_fallbacks(response_text, f"{self.provider_name} batch response")
+            if not success or not isinstance(verdicts, list):
+                return [(False, {}, "Failed to parse JSON array response")] * len(findings)
+        except Exception as e:
+            logger.exception("Error during batch security analysis: %s", e)
+            return [(False, {}, f"Batch security analysis failed: {str(e)}")] * len(findings)
+        
+        verdicts_by_id = {}
+        for verdict in verdicts:
+            if isinstance(verdict, dict) and 'finding_id' in verdict:
+                verdict = dict(verdict)
+                verdicts_by_id[str(verdict.pop('finding_id'))] = verdict
+        
+        results = []
+        for i in range(len(findings)):
+            verdict = verdicts_by_id.get(str(i))
+            if verdict is None:
+                results.append((False, {}, f"No verdict returned for finding {i} in batch"))
+            else:
+                results.append((True, verdict, ""))
+        return results
+    
     @property
     @abstractmethod
     def provider_name(self) -> str:
@@ -106,4 +951,201 @@ class LLMAPIClient(ABC):
         Returns:
             String identifier for the provider (e.g., "anthropic", "vertex", "bedrock")
         """
-        pass
\ No newline at end of file
+        pass
+    
+    def _generate_system_prompt(self, custom_filtering_instructions: Optional[str] = None) -> str:
+        """Generate system prompt for security analysis.
+        
+        The system prompt carries everything that is the same for every finding
+        (role, filtering rules and scoring scale), so it forms a long static
+        prefix that the provider can cache. It is built once per client for each
+        set of filtering instructions.
+        
+        Args:
+            custom_filtering_instructions: Optional custom filtering instructions
+                (defaults to DEFAULT_FILTERING_INSTRUCTIONS)
+            
+        Returns:
+            System prompt string
+        """
+        system_prompt = self._system_prompts.get(custom_filtering_instructions)
+        if system_prompt is None:
+            filtering_section = custom_filtering_instructions or DEFAULT_FILTERING_INSTRUCTIONS
+            system_prompt = f"""You are a security expert reviewing findings from an automated code audit tool.
+Your task is to filter out false positives and low-signal findings to reduce alert fatigue.
+You must maintain high recall (don't miss real vulnerabilities) while improving precision.
+
+{filtering_section}
+
+Assign each finding a confidence score from 1-10:
+- 1-3: Low confidence, likely false positive or noise
+- 4-6: Medium confidence, needs investigation  
+- 7-10: High confidence, likely true vulnerability
+
+Respond ONLY with valid JSON in the exact format specified in the user prompt.
+Do not include explanatory text, markdown formatting, or code blocks."""
+            self._system_prompts[custom_filtering_instructions] = system_prompt
+        return system_prompt
+    
+    def _generate_single_finding_prompt(self, 
+                                       finding: Dict[str, Any], 
+                                       pr_context: Optional[Dict[str, Any]] = None,
+                                       custom_filtering_instructions: Optional[str] = None) -> str:
+        """Generate prompt for analyzing a single security finding.
+        
+        Filtering instructions and the scoring scale are carried by the system
+        prompt (see _generate_system_prompt), so this only holds the parts that
+        vary per finding.
+        
+        Args:
+            finding: Single security finding
+            pr_context: Optional PR context
+            custom_filtering_instructions: Optional custom filtering instructions
+                (applied through the system prompt)
+            
+        Returns:
+            Formatted prompt string
+        """
+        pr_info = self._format_pr_info(pr_context)
+        file_content = self._format_file_content(finding.get('file', ''))
+        finding_json = json_dumps(finding, indent=True)
+        
+        return f"""I need you to analyze a security finding from an automated code audit and determine if it's a false positive, following the filtering rules above.
+
+{pr_info}
+
+Finding to analyze:
+```json
+{finding_json}
+```
+{file_content}
+
+Respond with EXACTLY this JSON structure (no markdown, no code blocks):
+{{
+  "original_severity": "HIGH",
+  "confidence_score": 8,
+  "keep_finding": true,
+  "exclusion_reason": null,
+  "justification": "Clear SQL injection vulnerability with specific exploit path"
+}}"""
+
+    
+    def _generate_batch_prompt(self,
+                               findings: List[Dict[str, Any]],
+                               pr_context: Optional[Dict[str, Any]] = None,
+                               custom_filtering_instructions: Optional[str] = None) -> str:
+        """Generate prompt for analyzing several security findings at once.
+        
+        Each finding is tagged with its index in the list as finding_id, and
+        the content of each referenced file is included once.
+        
+        Args:
+            findings: Security findings to analyze together
+            pr_context: Optional PR context
+            custom_filtering_instructions: Optional custom filtering instructions
+                (applied through the system prompt)
+            
+        Returns:
+            Formatted prompt string
+        """
+        pr_info = self._format_pr_info(pr_context)
+        
+        tagged_findings = [{"finding_id": i, **finding} for i, finding in enumerate(findings)]
+        findings_json = json_dumps(tagged_findings, indent=True)
+        
+        file_paths = dict.fromkeys(f.get('file', '') for f in findings if f.get('file'))
+        file_contents = "".join(self._format_file_content(path) for path in file_paths)
+        
+        return f"""I need you to analyze {len(findings)} security findings from an automated code audit and determine for each one if it's a false positive, following the filtering rules above.
+
+{pr_info}
+
+Findings to analyze:
+```json
+{findings_json}
+```
+{file_contents}
+
+Respond with EXACTLY a JSON array containing one object per finding, using the finding_id from the input (no markdown, no code blocks):
+[
+  {{
+    "finding_id": 0,
+    "original_severity": "HIGH",
+    "confidence_score": 8,
+    "keep_finding": true,
+    "exclusion_reason": null,
+    "justification": "Clear SQL injection vulnerability with specific exploit path"
+  }}
+]"""
+    
+    def _format_pr_info(self, pr_context: Optional[Dict[str, Any]]) -> str:
+        """Format PR context for inclusion in an analysis prompt."""
+        if not pr_context or not isinstance(pr_context, dict):
+            return ""
+        return f"""
+PR Context:
+- Repository: {pr_context.get('repo_name', 'unknown')}
+- PR #{pr_context.get('pr_number', 'unknown')}
+- Title: {pr_context.get('title', 'unknown')}
+- Description: {(pr_context.get('description') or 'No description')[:500]}...
+"""
+    
+    def _format_file_content(self, file_path: str) -> str:
+        """Read a finding's file and format it for inclusion in an analysis prompt."""
+        if not file_path:
+            return ""
+        success, content, error = self._read_file(file_path)
+        if success:
+            return f"""
+
+File Content ({file_path}):
+```
+{content}
+```"""
+        return f"""
+
+File Content ({file_path}): Error reading file - {error}
+"""
+    
+    def _read_file(self, file_path: str) -> Tuple[bool, str, str]:
+        """Read a file and format it with line numbers.
+        
+        Args:
+            file_path: Path to the file to read
+            
+        Returns:
+            Tuple of (success, formatted_content, error_message)
+        """
+        try:
+            # Check if REPO_PATH is set and use it as base path
+            repo_path = os.environ.get('REPO_PATH')
+            if repo_path:
+                # Convert file_path to Path and check if it's absolute
+                path = Path(file_path)
+                if not path.is_absolute():
+                    # Make it relative to REPO_PATH
+                    path = Path(repo_path) / file_path
+            else:
+                path = Path(file_path)
+            
+            if not path.exists():
+                return False, "", f"File not found: {path}"
+            
+            if not path.is_file():
+                return False, "", f"Path is not a file: {path}"
+            
+            # Read file with error handling for encoding issues
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except UnicodeDecodeError:
+                # Try with latin-1 encoding as fallback
+                with open(path, 'r', encoding='latin-1') as f:
+                    content = f.read()
+            
+            return True, content, ""
+            
+        except Exception as e:
+            error_msg = f"Error reading file {file_path}: {str(e)}"
+            logger.error(error_msg)
+            return False, "", error_msg
\ No newline at end of file
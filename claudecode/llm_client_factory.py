@@ -1,19 +1,41 @@
 """Factory for creating LLM API clients based on provider."""
 
+import importlib.util
 import os
-from typing import Optional, Dict, Any
-from dataclasses import dataclass
+import sys
+import hashlib
+import threading
+from functools import lru_cache
+from typing import Callable, Optional, Dict, Any, Mapping, Type
+from dataclasses import dataclass, replace
 
 from claudecode.llm_client_base import LLMAPIClient, CloudProvider
-from claudecode.constants import DEFAULT_CLAUDE_MODEL, DEFAULT_TIMEOUT_SECONDS, DEFAULT_MAX_RETRIES
+from claudecode.llm_cache import SemanticPromptCache, open_response_store
+from claudecode.rate_limit import get_shared_bucket
+from claudecode.constants import (
+    default_claude_model, DEFAULT_TIMEOUT_SECONDS, DEFAULT_MAX_RETRIES,
+    DEFAULT_POOL_MAX_CONNECTIONS, DEFAULT_POOL_MAX_KEEPALIVE, DEFAULT_POOL_KEEPALIVE_EXPIRY,
+    DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_LLM_PROVIDER,
+)
 from claudecode.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Provider lookup table, built once from the CloudProvider enum
+_PROVIDER_BY_NAME: Dict[str, CloudProvider] = {p.value: p for p in CloudProvider}
 
-@dataclass
+
+# __slots__ on dataclasses needs Python 3.10+; older interpreters just skip it
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class LLMConfig:
-    """Configuration for LLM API clients."""
+    """Configuration for LLM API clients.
+    
+    Immutable and hashable, so a config can key the client cache directly.
+    Use dataclasses.replace() to derive a modified copy.
+    """
     provider: CloudProvider
     model: str
     timeout_seconds: int = DEFAULT_TIMEOUT_SECONDS
@@ -24,6 +46,190 @@ class LLMConfig:
     project_id: Optional[str] = None  # Vertex AI
     region: Optional[str] = None  # Vertex AI  
     aws_region: Optional[str] = None  # Bedrock
+    
+    # HTTP connection pool shared by all requests made through one client
+    pool_max_connections: int = DEFAULT_POOL_MAX_CONNECTIONS
+    pool_max_keepalive: int = DEFAULT_POOL_MAX_KEEPALIVE
+    pool_keepalive_expiry: float = DEFAULT_POOL_KEEPALIVE_EXPIRY
+    
+    # Multiplex concurrent requests over one connection (needs the h2 package)
+    http2: bool = True
+    
+    # Validate API access in the background as soon as the client is built
+    prewarm: bool = True
+    
+    # SQLite file for the semantic finding-analysis cache (disabled if None)
+    prompt_cache_path: Optional[str] = None
+    
+    # Shelve file persisting exact-match responses across runs (memory only if None)
+    exact_cache_path: Optional[str] = None
+    
+    # Client-side request rate limit shared by all clients of a provider (0 disables)
+    requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE
+    
+    def __post_init__(self):
+        """Reject invalid settings before any provider SDK is imported.
+        
+        Provider names given as strings are converted to CloudProvider.
+        Credentials and regions are not checked here, since clients may still
+        read them from the environment; see LLMClientFactory.validate_config().
+        
+        Raises:
+            ValueError: If the provider is unknown or a numeric setting is out of range
+        """
+        if not isinstance(self.provider, CloudProvider):
+            # Frozen dataclass: normalize the field in place during construction
+            object.__setattr__(self, 'provider', _parse_provider(str(self.provider)))
+        
+        if self.timeout_seconds is not None and self.timeout_seconds <= 0:
+            raise ValueError(f"timeout_seconds must be positive, got {self.timeout_seconds}")
+        if self.max_retries is not None and self.max_retries < 0:
+            raise ValueError(f"max_retries must not be negative, got {self.max_retries}")
+        if self.pool_max_connections < 1:
+            raise ValueError(f"pool_max_connections must be at least 1, got {self.pool_max_connections}")
+        if self.pool_max_keepalive < 0 or self.pool_keepalive_expiry < 0:
+            raise ValueError("pool_max_keepalive and pool_keepalive_expiry must not be negative")
+        if self.requests_per_minute < 0:
+            raise ValueError(f"requests_per_minute must not be negative, got {self.requests_per_minute}")
+
+
+@lru_cache(maxsize=None)
+def _h2_available() -> bool:
+    """Check whether httpx can use HTTP/2, logging once when it cannot."""
+    if importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 disabled: install httpx[http2] to enable it")
+        return False
+    return True
+
+
+# Provider client modules are imported on first use only, so a run that uses one
+# provider never loads the other providers' SDK dependencies.
+@lru_cache(maxsize=None)
+def _load_anthropic_client() -> Type[LLMAPIClient]:
+    from claudecode.anthropic_client import AnthropicAPIClient
+    return AnthropicAPIClient
+
+
+@lru_cache(maxsize=None)
+def _load_vertex_client() -> Type[LLMAPIClient]:
+    from claudecode.vertex_client import VertexAIClient
+    return VertexAIClient
+
+
+@lru_cache(maxsize=None)
+def _load_bedrock_client() -> Type[LLMAPIClient]:
+    from claudecode.bedrock_client import BedrockClient
+    return BedrockClient
+
+
+def _with_http_client(config: LLMConfig, construct: Callable[[Any], LLMAPIClient]) -> LLMAPIClient:
+    """Build the pooled HTTP client and pass it to a client constructor.
+    
+    The HTTP client is closed again if the constructor raises, so a failed
+    client build does not leak its connection pool.
+    """
+    http_client = LLMClientFactory._build_http_client(config)
+    try:
+        return construct(http_client)
+    except BaseException:
+        http_client.close()
+        raise
+
+
+def _build_anthropic_client(config: LLMConfig) -> LLMAPIClient:
+    return _with_http_client(config, lambda http_client: _load_anthropic_client()(
+        model=config.model,
+        api_key=config.api_key,
+        timeout_seconds=config.timeout_seconds,
+        max_retries=config.max_retries,
+        http_client=http_client
+    ))
+
+
+def _build_vertex_client(config: LLMConfig) -> LLMAPIClient:
+    return _with_http_client(config, lambda http_client: _load_vertex_client()(
+        model=config.model,
+        project_id=config.project_id,
+        region=config.region,
+        timeout_seconds=config.timeout_seconds,
+        max_retries=config.max_retries,
+        http_client=http_client
+    ))
+
+
+def _build_bedrock_client(config: LLMConfig) -> LLMAPIClient:
+    return _with_http_client(config, lambda http_client: _load_bedrock_client()(
+        model=config.model,
+        aws_region=config.aws_region,
+        timeout_seconds=config.timeout_seconds,
+        max_retries=config.max_retries,
+        http_client=http_client
+    ))
+
+
+# Provider -> constructor for a new, uncached client
+_CLIENT_BUILDERS: Dict[CloudProvider, Callable[[LLMConfig], LLMAPIClient]] = {
+    CloudProvider.ANTHROPIC: _build_anthropic_client,
+    CloudProvider.VERTEX_AI: _build_vertex_client,
+    CloudProvider.BEDROCK: _build_bedrock_client,
+}
+
+
+# Process-wide client cache so repeated factory calls reuse one SDK client
+# (and its keep-alive connection pool) per distinct configuration.
+_CLIENT_CACHE: Dict[LLMConfig, LLMAPIClient] = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+
+def _client_cache_key(config: LLMConfig) -> LLMConfig:
+    """Build the client cache key for a config without keeping the raw API key."""
+    if config.api_key is None:
+        return config
+    return replace(config, api_key=hashlib.sha256(config.api_key.encode('utf-8')).hexdigest())
+
+
+def _parse_provider(raw: str, error_prefix: str = "Unsupported provider") -> CloudProvider:
+    """Look up a CloudProvider by case-insensitive name.
+    
+    Args:
+        raw: Provider name as given by the caller or environment
+        error_prefix: Start of the error message if the name is unknown
+        
+    Returns:
+        Matching CloudProvider
+        
+    Raises:
+        ValueError: If the name is not a supported provider
+    """
+    provider = _PROVIDER_BY_NAME.get(raw.lower())
+    if provider is None:
+        raise ValueError(f"{error_prefix}: {raw}. Supported: {list(_PROVIDER_BY_NAME)}")
+    return provider
+
+
+def _int_env(env: Mapping[str, str], name: str, default: int) -> int:
+    """Read an integer setting from an environment mapping.
+    
+    The default is returned as-is when the variable is unset, so int() only
+    runs on values that were actually provided.
+    """
+    value = env.get(name)
+    if value is None:
+        return default
+    return int(value)
+
+
+def clear_client_cache() -> None:
+    """Close and forget all cached LLM clients."""
+    with _CLIENT_CACHE_LOCK:
+        clients = list(_CLIENT_CACHE.values())
+        _CLIENT_CACHE.clear()
+    for client in clients:
+        client._shared = False
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning("Failed to close cached LLM client: %s", e)
 
 
 class LLMClientFactory:
@@ -33,6 +239,10 @@ class LLMClientFactory:
     def create_client(config: LLMConfig) -> LLMAPIClient:
         """Create an LLM API client based on configuration.
         
+        Clients are cached per configuration, so calling this repeatedly with an
+        equivalent config returns the same instance. Cached clients are shared,
+        so close() on them is a no-op; clear_client_cache() releases them.
+        
         Args:
             config: LLM configuration object
             
@@ -42,33 +252,71 @@ class LLMClientFactory:
         Raises:
             ValueError: If unsupported provider or invalid configuration
         """
-        if config.provider == CloudProvider.ANTHROPIC:
-            from claudecode.anthropic_client import AnthropicAPIClient
-            return AnthropicAPIClient(
-                model=config.model,
-                api_key=config.api_key,
-                timeout_seconds=config.timeout_seconds,
-                max_retries=config.max_retries
-            )
-        elif config.provider == CloudProvider.VERTEX_AI:
-            from claudecode.vertex_client import VertexAIClient
-            return VertexAIClient(
-                model=config.model,
-                project_id=config.project_id,
-                region=config.region,
-                timeout_seconds=config.timeout_seconds,
-                max_retries=config.max_retries
-            )
-        elif config.provider == CloudProvider.BEDROCK:
-            from claudecode.bedrock_client import BedrockClient
-            return BedrockClient(
-                model=config.model,
-                aws_region=config.aws_region,
-                timeout_seconds=config.timeout_seconds,
-                max_retries=config.max_retries
-            )
-        else:
+        cache_key = _client_cache_key(config)
+        with _CLIENT_CACHE_LOCK:
+            client = _CLIENT_CACHE.get(cache_key)
+        if client is not None:
+            return client
+        
+        # Build outside the lock so slow SDK or credential setup for one
+        # configuration does not hold up lookups for every other one
+        client = LLMClientFactory._build_client(config)
+        if config.prompt_cache_path:
+            client.prompt_cache = SemanticPromptCache(config.prompt_cache_path)
+        if config.exact_cache_path:
+            client.exact_cache_store = open_response_store(config.exact_cache_path)
+        if config.requests_per_minute > 0:
+            client.rate_limiter = get_shared_bucket(config.provider.value, config.requests_per_minute)
+        client.http_client_options = LLMClientFactory._http_client_options(config)
+        client._shared = True
+        
+        with _CLIENT_CACHE_LOCK:
+            cached = _CLIENT_CACHE.setdefault(cache_key, client)
+        if cached is not client:
+            # Another thread cached an equivalent client first; use that one
+            client._shared = False
+            client.close()
+            return cached
+        
+        if config.prewarm:
+            client.prewarm()
+        return client
+    
+    @staticmethod
+    def _build_client(config: LLMConfig) -> LLMAPIClient:
+        """Construct a new, uncached LLM API client for the given configuration."""
+        builder = _CLIENT_BUILDERS.get(config.provider)
+        if builder is None:
             raise ValueError(f"Unsupported provider: {config.provider}")
+        return builder(config)
+    
+    @staticmethod
+    def _build_http_client(config: LLMConfig):
+        """Build an httpx client with a connection pool sized from the config.
+        
+        Uses the SDK's DefaultHttpxClient so the SDK's own transport defaults
+        are kept and only the pool limits, HTTP version and timeout are overridden.
+        """
+        from anthropic import DefaultHttpxClient
+        
+        return DefaultHttpxClient(
+            **LLMClientFactory._http_client_options(config),
+            timeout=config.timeout_seconds
+        )
+    
+    @staticmethod
+    def _http_client_options(config: LLMConfig) -> Dict[str, Any]:
+        """Build httpx client options from the config (shared by sync and async clients)."""
+        import httpx
+        
+        return {
+            "limits": httpx.Limits(
+                max_connections=config.pool_max_connections,
+                max_keepalive_connections=config.pool_max_keepalive,
+                keepalive_expiry=config.pool_keepalive_expiry
+            ),
+            "http2": config.http2 and _h2_available(),
+        }
     
     @staticmethod
     def create_client_from_dict(provider: str, **kwargs) -> LLMAPIClient:
@@ -81,33 +329,38 @@ class LLMClientFactory:
         Returns:
             Initialized LLMAPIClient instance
         """
-        try:
-            provider_enum = CloudProvider(provider.lower())
-        except ValueError:
-            raise ValueError(f"Unsupported provider: {provider}. Supported: {[p.value for p in CloudProvider]}")
+        provider_enum = _parse_provider(provider)
         
         config = LLMConfig(
             provider=provider_enum,
-            model=kwargs.get('model', DEFAULT_CLAUDE_MODEL),
+            model=kwargs.get('model') or default_claude_model(),
             timeout_seconds=kwargs.get('timeout_seconds', DEFAULT_TIMEOUT_SECONDS),
             max_retries=kwargs.get('max_retries', DEFAULT_MAX_RETRIES),
             api_key=kwargs.get('api_key'),
             project_id=kwargs.get('project_id'),
             region=kwargs.get('region'),
-            aws_region=kwargs.get('aws_region')
+            aws_region=kwargs.get('aws_region'),
+            prompt_cache_path=kwargs.get('prompt_cache_path'),
+            exact_cache_path=kwargs.get('exact_cache_path'),
+            requests_per_minute=kwargs.get('requests_per_minute', DEFAULT_REQUESTS_PER_MINUTE),
+            http2=kwargs.get('http2', True)
         )
         
         return LLMClientFactory.create_client(config)
     
     @staticmethod
-    def from_environment() -> LLMAPIClient:
+    def from_environment(env: Optional[Mapping[str, str]] = None) -> LLMAPIClient:
         """Create client from environment variables.
         
         Environment variables:
         - LLM_PROVIDER: Provider name ('anthropic', 'vertex', 'bedrock')
-        - CLAUDE_MODEL: Model name (optional, defaults to DEFAULT_CLAUDE_MODEL)
+        - CLAUDE_MODEL: Model name (optional, defaults to default_claude_model())
         - LLM_TIMEOUT_SECONDS: Timeout in seconds (optional)
         - LLM_MAX_RETRIES: Max retry attempts (optional)
+        - LLM_PROMPT_CACHE_PATH: SQLite file for the semantic analysis cache (optional)
+        - LLM_EXACT_CACHE_PATH: Shelve file persisting exact-match responses (optional)
+        - LLM_REQUESTS_PER_MINUTE: Client-side request rate limit, 0 to disable (optional)
+        - LLM_HTTP2: Set to 'false' to use HTTP/1.1 only (optional)
         
         Provider-specific:
         - ANTHROPIC_API_KEY: Anthropic API key
@@ -115,31 +368,35 @@ class LLMClientFactory:
         - GOOGLE_CLOUD_REGION: GCP region
         - AWS_REGION: AWS region
         
+        Args:
+            env: Optional environment mapping to read instead of os.environ
+        
         Returns:
             Initialized LLMAPIClient instance
             
         Raises:
             ValueError: If invalid provider or missing required configuration
         """
-        provider_str = os.environ.get('LLM_PROVIDER', 'anthropic').lower()
-        
-        try:
-            provider = CloudProvider(provider_str)
-        except ValueError:
-            raise ValueError(f"Invalid LLM_PROVIDER: {provider_str}. Supported: {[p.value for p in CloudProvider]}")
+        # Snapshot once so every setting comes from the same view of the environment
+        env = os.environ.copy() if env is None else env
+        provider = _parse_provider(env.get('LLM_PROVIDER') or DEFAULT_LLM_PROVIDER, error_prefix="Invalid LLM_PROVIDER")
         
         config = LLMConfig(
             provider=provider,
-            model=os.environ.get('CLAUDE_MODEL', DEFAULT_CLAUDE_MODEL),
-            timeout_seconds=int(os.environ.get('LLM_TIMEOUT_SECONDS', DEFAULT_TIMEOUT_SECONDS)),
-            max_retries=int(os.environ.get('LLM_MAX_RETRIES', DEFAULT_MAX_RETRIES)),
-            api_key=os.environ.get('ANTHROPIC_API_KEY'),
-            project_id=os.environ.get('GOOGLE_CLOUD_PROJECT'),
-            region=os.environ.get('GOOGLE_CLOUD_REGION', 'us-central1'),
-            aws_region=os.environ.get('AWS_REGION', 'us-east-1')
+            model=env.get('CLAUDE_MODEL') or default_claude_model(),
+            timeout_seconds=_int_env(env, 'LLM_TIMEOUT_SECONDS', DEFAULT_TIMEOUT_SECONDS),
+            max_retries=_int_env(env, 'LLM_MAX_RETRIES', DEFAULT_MAX_RETRIES),
+            api_key=env.get('ANTHROPIC_API_KEY'),
+            project_id=env.get('GOOGLE_CLOUD_PROJECT'),
+            region=env.get('GOOGLE_CLOUD_REGION', 'us-central1'),
+            aws_region=env.get('AWS_REGION', 'us-east-1'),
+            prompt_cache_path=env.get('LLM_PROMPT_CACHE_PATH'),
+            exact_cache_path=env.get('LLM_EXACT_CACHE_PATH'),
+            requests_per_minute=_int_env(env, 'LLM_REQUESTS_PER_MINUTE', DEFAULT_REQUESTS_PER_MINUTE),
+            http2=env.get('LLM_HTTP2', 'true').lower() != 'false'
         )
         
-        logger.info(f"Creating LLM client for provider: {provider.value}")
+        logger.info("Creating LLM client for provider: %s", provider.value)
         return LLMClientFactory.create_client(config)
     
     @staticmethod
@@ -149,7 +406,7 @@ class LLMClientFactory:
         Returns:
             List of supported provider strings
         """
-        return [provider.value for provider in CloudProvider]
+        return list(_PROVIDER_BY_NAME)
     
     @staticmethod 
     def validate_config(config: LLMConfig) -> tuple[bool, str]:
@@ -200,7 +457,7 @@ def get_client_from_env() -> LLMAPIClient:
 
 
 # For backward compatibility with existing claude_api_client usage
-def get_claude_api_client_multi_provider(model: str = DEFAULT_CLAUDE_MODEL,
+def get_claude_api_client_multi_provider(model: Optional[str] = None,
                                         api_key: Optional[str] = None,
                                         timeout_seconds: int = DEFAULT_TIMEOUT_SECONDS,
                                         provider: Optional[str] = None) -> LLMAPIClient:
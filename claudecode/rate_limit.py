@@ -0,0 +1,114 @@
+"""Client-side rate limiting for LLM API requests."""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Tuple
+
+from claudecode.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket that throttles callers before the API does."""
+
+    def __init__(self, rate_per_sec: float, burst: float):
+        """Initialize a full token bucket.
+
+        Args:
+            rate_per_sec: Tokens added per second
+            burst: Maximum number of tokens the bucket can hold
+        """
+        if rate_per_sec <= 0 or burst < 1:
+            raise ValueError("rate_per_sec must be positive and burst at least 1")
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """Add tokens for the time elapsed since the last update. Caller holds the lock."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate_per_sec)
+        self._updated = now
+
+    def _reserve(self, tokens: float) -> float:
+        """Take tokens if available.
+
+        Returns:
+            0.0 if the tokens were taken, otherwise seconds until enough accumulate
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate_per_sec
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available without waiting.
+
+        Returns:
+            True if the tokens were taken, False otherwise
+        """
+        return self._reserve(tokens) == 0.0
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens, sleeping until enough have accumulated.
+
+        Returns:
+            Total seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            wait = self._reserve(tokens)
+            if not wait:
+                if waited:
+                    logger.info("Rate limiter delayed request by %.1fs", waited)
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def aacquire(self, tokens: float = 1.0) -> float:
+        """Take tokens, yielding to the event loop until enough have accumulated.
+
+        Returns:
+            Total seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            wait = self._reserve(tokens)
+            if not wait:
+                if waited:
+                    logger.info("Rate limiter delayed request by %.1fs", waited)
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+
+_SHARED_BUCKETS: Dict[Tuple[str, int], TokenBucket] = {}
+_SHARED_BUCKETS_LOCK = threading.Lock()
+
+
+def get_shared_bucket(name: str, requests_per_minute: int) -> TokenBucket:
+    """Get the process-wide bucket for a quota, creating it on first use.
+
+    Clients for the same provider share one bucket, since provider quotas
+    apply per account rather than per client object.
+
+    Args:
+        name: Quota name (typically the provider name)
+        requests_per_minute: Allowed requests per minute
+
+    Returns:
+        Shared TokenBucket allowing a full minute's worth of burst
+    """
+    key = (name, requests_per_minute)
+    with _SHARED_BUCKETS_LOCK:
+        bucket = _SHARED_BUCKETS.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate_per_sec=requests_per_minute / 60.0, burst=requests_per_minute)
+            _SHARED_BUCKETS[key] = bucket
+        return bucket
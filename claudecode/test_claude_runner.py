@@ -10,7 +10,7 @@ from unittest.mock import Mock, patch
 from pathlib import Path
 
 from claudecode.github_action_audit import SimpleClaudeRunner
-from claudecode.constants import DEFAULT_CLAUDE_MODEL
+from claudecode.constants import default_claude_model
 
 
 class TestSimpleClaudeRunner:
@@ -166,7 +166,7 @@ class TestSimpleClaudeRunner:
         assert call_args[0][0] == [
             'claude',
             '--output-format', 'json',
-            '--model', DEFAULT_CLAUDE_MODEL
+            '--model', default_claude_model()
         ]
         assert call_args[1]['input'] == 'test prompt'
         assert call_args[1]['cwd'] == Path('/tmp/test')
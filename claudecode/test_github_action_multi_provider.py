@@ -2,7 +2,7 @@
 
 import os
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, ANY
 import tempfile
 import json
 
@@ -29,7 +29,7 @@ class TestGitHubActionMultiProvider:
         assert findings_filter.use_claude_filtering is True
         assert findings_filter.claude_client is not None
         assert findings_filter.claude_client.provider_name == "anthropic"
-        mock_anthropic.assert_called_once_with(api_key='test-anthropic-key')
+        mock_anthropic.assert_called_once_with(api_key='test-anthropic-key', http_client=ANY)
 
     @patch.dict(os.environ, {
         'LLM_PROVIDER': 'vertex',
@@ -38,7 +38,7 @@ class TestGitHubActionMultiProvider:
         'ENABLE_CLAUDE_FILTERING': 'true',
         'CLAUDE_MODEL': 'claude-3-sonnet-20240229'
     })
-    @patch('claudecode.vertex_client.AnthropicVertex')
+    @patch('anthropic.AnthropicVertex')
     def test_vertex_provider_initialization(self, mock_vertex):
         """Test findings filter initialization with Vertex AI provider."""
         findings_filter = initialize_findings_filter()
@@ -48,7 +48,8 @@ class TestGitHubActionMultiProvider:
         assert findings_filter.claude_client.provider_name == "vertex"
         mock_vertex.assert_called_once_with(
             region='us-central1',
-            project_id='test-project'
+            project_id='test-project',
+            http_client=ANY
         )
 
     @patch.dict(os.environ, {
@@ -57,7 +58,7 @@ class TestGitHubActionMultiProvider:
         'ENABLE_CLAUDE_FILTERING': 'true',
         'CLAUDE_MODEL': 'claude-3-sonnet-20240229'
     })
-    @patch('claudecode.bedrock_client.AnthropicBedrock')
+    @patch('anthropic.AnthropicBedrock')
     def test_bedrock_provider_initialization(self, mock_bedrock):
         """Test findings filter initialization with Bedrock provider."""
         findings_filter = initialize_findings_filter()
@@ -65,7 +66,7 @@ class TestGitHubActionMultiProvider:
         assert findings_filter.use_claude_filtering is True
         assert findings_filter.claude_client is not None
         assert findings_filter.claude_client.provider_name == "bedrock"
-        mock_bedrock.assert_called_once_with(aws_region='us-east-1')
+        mock_bedrock.assert_called_once_with(aws_region='us-east-1', http_client=ANY)
 
     @patch.dict(os.environ, {
         'LLM_PROVIDER': 'invalid-provider',
@@ -100,7 +101,7 @@ class TestGitHubActionMultiProvider:
         """Test custom filtering instructions are passed through."""
         custom_instructions = "Custom filtering rules for this project"
         
-        with patch('claudecode.vertex_client.AnthropicVertex'):
+        with patch('anthropic.AnthropicVertex'):
             findings_filter = initialize_findings_filter(custom_instructions)
             
             assert findings_filter.custom_filtering_instructions == custom_instructions
@@ -167,7 +168,7 @@ class TestActionYmlCompatibility:
         }
         
         with patch.dict(os.environ, env_vars):
-            with patch('claudecode.vertex_client.AnthropicVertex'):
+            with patch('anthropic.AnthropicVertex'):
                 findings_filter = initialize_findings_filter()
                 
                 assert findings_filter.claude_client.provider_name == "vertex"
@@ -250,12 +251,8 @@ class TestProviderValidation:
             'AWS_REGION': 'us-west-2',
             'ENABLE_CLAUDE_FILTERING': 'true'
         }):
-            with patch('claudecode.bedrock_client.AnthropicBedrock'):
+            with patch('anthropic.AnthropicBedrock'):
                 findings_filter = initialize_findings_filter()
                 
                 assert findings_filter.claude_client.provider_name == "bedrock"
                 assert findings_filter.claude_client.aws_region == "us-west-2"
-
-
-if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
@@ -107,7 +107,7 @@ class TestHelperFunctions:
         with patch.dict(os.environ, {
             'ENABLE_CLAUDE_FILTERING': 'true',
             'ANTHROPIC_API_KEY': 'test-key-123'
-        }):
+        }, clear=True):
             result = initialize_findings_filter()
             
             assert result == mock_filter_instance
@@ -115,9 +115,48 @@ class TestHelperFunctions:
                 use_hard_exclusions=True,
                 use_claude_filtering=True,
                 api_key='test-key-123',
-                custom_filtering_instructions=None
+                model=None,
+                custom_filtering_instructions=None,
+                provider='anthropic',
+                max_concurrency=8
             )
     
+    @pytest.mark.parametrize('value, expected', [('', 'anthropic'), ('Vertex', 'vertex')])
+    @patch('claudecode.github_action_audit.FindingsFilter')
+    def test_initialize_findings_filter_provider(self, mock_filter, value, expected):
+        """Test that LLM_PROVIDER is normalized and an empty value means the default provider."""
+        with patch.dict(os.environ, {
+            'ENABLE_CLAUDE_FILTERING': 'true',
+            'LLM_PROVIDER': value
+        }):
+            initialize_findings_filter()
+            
+            assert mock_filter.call_args.kwargs['provider'] == expected
+    
+    @patch('claudecode.github_action_audit.FindingsFilter')
+    def test_initialize_findings_filter_max_concurrency(self, mock_filter):
+        """Test that LLM_MAX_CONCURRENCY is passed through to the filter."""
+        with patch.dict(os.environ, {
+            'ENABLE_CLAUDE_FILTERING': 'true',
+            'LLM_MAX_CONCURRENCY': '3'
+        }):
+            initialize_findings_filter()
+            
+            assert mock_filter.call_args.kwargs['max_concurrency'] == 3
+    
+    @pytest.mark.parametrize('value', ['abc', '0', '-2', '1.5'])
+    @patch('claudecode.github_action_audit.FindingsFilter')
+    def test_initialize_findings_filter_invalid_max_concurrency(self, mock_filter, value):
+        """Test that an invalid LLM_MAX_CONCURRENCY is reported as a configuration error."""
+        with patch.dict(os.environ, {
+            'ENABLE_CLAUDE_FILTERING': 'true',
+            'LLM_MAX_CONCURRENCY': value
+        }):
+            with pytest.raises(ConfigurationError, match='Invalid LLM_MAX_CONCURRENCY'):
+                initialize_findings_filter()
+        
+        mock_filter.assert_not_called()
+    
     @patch('claudecode.github_action_audit.FindingsFilter')
     def test_initialize_findings_filter_without_claude(self, mock_simple_filter):
         """Test initializing findings filter without Claude API."""
@@ -5,6 +5,7 @@ Pytest tests for SAST integration components.
 
 import pytest
 import json
+from unittest.mock import patch, Mock, MagicMock, AsyncMock
 
 class TestClaudeCodeAudit:
     """Test the main audit functionality."""
@@ -105,4 +106,56 @@ class TestFilteringIntegration:
         assert stats.kept_findings == 1  # Only SQL injection
         assert stats.hard_excluded == 1  # Rate limiting
         assert stats.claude_excluded == 0  # No Claude filtering
-    
\ No newline at end of file
+        
+    def test_explicit_provider_keeps_environment_settings(self, monkeypatch, tmp_path, mock_anthropic):
+        """Test that LLM_* settings apply when the provider is passed explicitly."""
+        from claudecode.findings_filter import FindingsFilter
+        from claudecode.llm_cache import SemanticPromptCache
+        
+        monkeypatch.setenv('LLM_PROMPT_CACHE_PATH', str(tmp_path / 'prompt_cache.sqlite'))
+        monkeypatch.setenv('LLM_REQUESTS_PER_MINUTE', '0')
+        
+        filter_instance = FindingsFilter(provider='anthropic', api_key='test-key')
+        
+        assert filter_instance.use_claude_filtering is True
+        assert isinstance(filter_instance.claude_client.prompt_cache, SemanticPromptCache)
+        assert filter_instance.claude_client.rate_limiter is None
+        mock_anthropic.assert_called_once()
+    
+    def test_filter_findings_through_concurrent_llm_path(self, mock_async_anthropic):
+        """Test filter_findings end to end with a mocked async Anthropic SDK."""
+        from claudecode.findings_filter import FindingsFilter
+        from claudecode.llm_client_factory import clear_client_cache
+        
+        def open_stream(**kwargs):
+            prompt = kwargs["messages"][0]["content"]
+            if "Hardcoded token in fixture" in prompt:
+                verdict = '{"confidence_score": 2, "keep_finding": false, "exclusion_reason": "Test code"}'
+            else:
+                verdict = '{"confidence_score": 9, "keep_finding": true, "justification": "Exploitable"}'
+            
+            async def text_stream():
+                yield verdict
+            
+            stream = MagicMock()
+            stream.__aenter__ = AsyncMock(return_value=Mock(text_stream=text_stream()))
+            stream.__aexit__ = AsyncMock(return_value=False)
+            return stream
+        
+        mock_async_anthropic.return_value.messages.stream.side_effect = open_stream
+        mock_async_anthropic.return_value.close = AsyncMock()
+        
+        filter_instance = FindingsFilter(provider='anthropic', api_key='test-key', max_concurrency=2)
+        success, results, stats = filter_instance.filter_findings([
+            {'description': 'SQL injection in login query', 'severity': 'HIGH', 'file': 'app.py'},
+            {'description': 'Hardcoded token in fixture', 'severity': 'MEDIUM', 'file': 'app.py'},
+        ])
+        clear_client_cache()
+        
+        assert success is True
+        assert stats.kept_findings == 1
+        assert stats.claude_excluded == 1
+        assert results['filtered_findings'][0]['description'] == 'SQL injection in login query'
+        assert results['filtered_findings'][0]['_filter_metadata']['confidence_score'] == 9
+        assert results['excluded_findings'][0]['filter_stage'] == 'claude_api'
+        assert mock_async_anthropic.return_value.messages.stream.call_count == 2
@@ -1,8 +1,13 @@
 """Unit tests for the json_parser module."""
 
 import json
+import math
+import pytest
 from typing import Any, Dict
-from claudecode.json_parser import parse_json_with_fallbacks, extract_json_from_text
+from claudecode.json_parser import (
+    parse_json_with_fallbacks, extract_json_from_text, json_dumps, json_loads, JsonCompletionTracker,
+    matches_json_type
+)
 
 
 class TestJsonParser:
@@ -236,4 +241,93 @@ class TestJsonParser:
         result = extract_json_from_text(text)
         
         # Should be able to extract the JSON
-        assert result == {"nested": "json"}
\ No newline at end of file
+        assert result == {"nested": "json"}
+    
+    def test_parse_fenced_json_array(self):
+        """Test parsing a JSON array wrapped in a markdown code fence."""
+        fenced = '```json\n[{"finding_id": 0, "keep_finding": true}]\n```'
+        success, result = parse_json_with_fallbacks(fenced)
+        
+        assert success is True
+        assert result == [{"finding_id": 0, "keep_finding": True}]
+    
+    def test_json_dumps_round_trip(self):
+        """Test that json_dumps output matches stdlib formatting and parses back."""
+        data = {"file": "app.py", "line": 42, "tags": ["sql", "injection"], "score": 0.5}
+        
+        assert json_dumps(data, indent=True) == json.dumps(data, indent=2)
+        assert json_loads(json_dumps(data)) == data
+    
+    def test_json_loads_falls_back_for_non_finite_numbers(self):
+        """Test that NaN and Infinity literals still parse as they did with the stdlib."""
+        result = json_loads('{"score": NaN, "max": Infinity}')
+        
+        assert math.isnan(result["score"])
+        assert result["max"] == math.inf
+    
+    def test_json_loads_rejects_non_string_input(self):
+        """Test that non-string input raises TypeError, as with the stdlib."""
+        with pytest.raises(TypeError):
+            parse_json_with_fallbacks(None)
+    
+    def test_json_dumps_falls_back_for_big_integers(self):
+        """Test that integers orjson cannot serialize are written by the stdlib."""
+        data = {"id": 2 ** 70, "tags": ["é"]}
+        
+        assert json_dumps(data) == '{"id":1180591620717411303424,"tags":["é"]}'
+        assert json_dumps(data, indent=True) == json.dumps(data, indent=2, ensure_ascii=False)
+        assert json_loads(json_dumps(data)) == data
+    
+    def test_completion_tracker_across_chunks(self):
+        """Test that completion is detected only when the top-level value closes."""
+        tracker = JsonCompletionTracker()
+        
+        assert tracker.feed('```json\n{"a": {"b": ') is False
+        assert tracker.feed('"text with } and \\" quote"}') is False
+        assert tracker.feed('}') is True
+    
+    def test_completion_tracker_array(self):
+        """Test completion detection for a top-level array."""
+        tracker = JsonCompletionTracker()
+        
+        assert tracker.feed('[{"finding_id": 0}, ') is False
+        assert tracker.feed('{"finding_id": 1}]') is True
+    
+    def test_completion_tracker_skips_brackets_in_prose(self):
+        """Test that brackets before the JSON value do not end the stream early."""
+        tracker = JsonCompletionTracker()
+        
+        assert tracker.feed('Verdict [final]: ') is False
+        assert tracker.feed('{"keep_finding": true, ') is False
+        assert tracker.feed('"tags": ["a"]}') is True
+    
+    def test_completion_tracker_prose_before_array(self):
+        """Test that a batch array is found after a bracketed non-JSON prefix."""
+        tracker = JsonCompletionTracker()
+        
+        assert tracker.feed('See [notes] and [') is False
+        assert tracker.feed('{"finding_id": 0}') is False
+        assert tracker.feed(']') is True
+    
+    def test_completion_tracker_skips_citation_when_object_expected(self):
+        """Test that a bracketed citation is not taken for the expected object."""
+        tracker = JsonCompletionTracker(dict)
+        
+        assert tracker.feed('Per rule [1], ') is False
+        assert tracker.feed('{"keep_finding": true}') is True
+    
+    def test_completion_tracker_array_of_objects_expected(self):
+        """Test that only an array of objects completes when a batch array is expected."""
+        tracker = JsonCompletionTracker(list)
+        
+        assert tracker.feed('See [1] and [2, 3]: ') is False
+        assert tracker.feed('[{"finding_id": 0}]') is True
+    
+    def test_matches_json_type(self):
+        """Test the expected-shape check used by the tracker."""
+        assert matches_json_type({"a": 1}, dict)
+        assert not matches_json_type([1], dict)
+        assert matches_json_type([{"finding_id": 0}], list)
+        assert not matches_json_type([1], list)
+        assert matches_json_type([1])
+        assert not matches_json_type("text")
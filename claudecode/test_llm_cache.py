@@ -0,0 +1,92 @@
+"""Unit tests for the llm_cache module."""
+
+import math
+
+from claudecode.llm_cache import SemanticPromptCache, hashed_ngram_embedding, open_response_store
+
+
+FINDING_TEXT = '{"description": "User input flows into SQL query without parameterization", "file": "app/db.py", "line": 42}'
+
+
+class TestHashedNgramEmbedding:
+    """Test the default embedding function."""
+
+    def test_embedding_is_unit_length(self):
+        """Test that embeddings are L2-normalized."""
+        vector = hashed_ngram_embedding(FINDING_TEXT)
+
+        assert math.isclose(sum(v * v for v in vector), 1.0)
+
+    def test_embedding_is_deterministic(self):
+        """Test that the same text always embeds the same way."""
+        assert hashed_ngram_embedding(FINDING_TEXT) == hashed_ngram_embedding(FINDING_TEXT)
+
+    def test_empty_text(self):
+        """Test that text without tokens embeds to a zero vector."""
+        assert not any(hashed_ngram_embedding("  !!  "))
+
+
+class TestSemanticPromptCache:
+    """Test SQLite-backed semantic cache."""
+
+    def test_exact_hit(self, tmp_path):
+        """Test looking up a previously stored text."""
+        cache = SemanticPromptCache(str(tmp_path / "cache.db"))
+        cache.store("ns", FINDING_TEXT, {"keep_finding": True})
+
+        assert cache.lookup("ns", FINDING_TEXT) == {"keep_finding": True}
+        cache.close()
+
+    def test_miss_below_threshold(self, tmp_path):
+        """Test that unrelated text does not hit the cache."""
+        cache = SemanticPromptCache(str(tmp_path / "cache.db"))
+        cache.store("ns", FINDING_TEXT, {"keep_finding": True})
+
+        assert cache.lookup("ns", '{"description": "Hardcoded AWS secret key in config"}') is None
+        cache.close()
+
+    def test_similar_text_hits_with_lower_threshold(self, tmp_path):
+        """Test that near-identical text hits when similarity meets the threshold."""
+        cache = SemanticPromptCache(str(tmp_path / "cache.db"), threshold=0.8)
+        cache.store("ns", FINDING_TEXT, {"keep_finding": False})
+
+        similar = FINDING_TEXT.replace("query", "statement")
+
+        assert cache.lookup("ns", similar) == {"keep_finding": False}
+        cache.close()
+
+    def test_namespaces_are_isolated(self, tmp_path):
+        """Test that entries from one namespace are not returned for another."""
+        cache = SemanticPromptCache(str(tmp_path / "cache.db"))
+        cache.store("model-a", FINDING_TEXT, {"keep_finding": True})
+
+        assert cache.lookup("model-b", FINDING_TEXT) is None
+        cache.close()
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that entries survive reopening the database."""
+        path = str(tmp_path / "nested" / "cache.db")
+        cache = SemanticPromptCache(path)
+        cache.store("ns", FINDING_TEXT, {"confidence_score": 3})
+        cache.close()
+
+        reopened = SemanticPromptCache(path)
+
+        assert reopened.lookup("ns", FINDING_TEXT) == {"confidence_score": 3}
+        reopened.close()
+
+
+class TestResponseStore:
+    """Test the persistent exact-match response store."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that stored responses can be read back after reopening."""
+        path = str(tmp_path / "cache" / "exact.db")
+        store = open_response_store(path)
+        store["key"] = (True, "response", "")
+        store.close()
+
+        reopened = open_response_store(path)
+
+        assert reopened["key"] == (True, "response", "")
+        reopened.close()
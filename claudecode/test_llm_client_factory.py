@@ -1,302 +1,526 @@
 """Tests for LLM client factory and multi-provider support."""
 
 import os
+import re
+import subprocess
+import sys
 import pytest
-from unittest.mock import patch, MagicMock
+from dataclasses import FrozenInstanceError, replace
+from unittest.mock import patch, Mock, ANY
 
 from claudecode.llm_client_factory import (
     LLMClientFactory, LLMConfig, get_llm_client, get_client_from_env,
-    get_claude_api_client_multi_provider
+    get_claude_api_client_multi_provider, clear_client_cache, _client_cache_key,
+    _CLIENT_BUILDERS
 )
-from claudecode.llm_client_base import CloudProvider, LLMAPIClient
-from claudecode.constants import DEFAULT_CLAUDE_MODEL
+from claudecode.llm_client_base import CloudProvider
+from claudecode.constants import DEFAULT_CLAUDE_MODEL, default_claude_model
 
 
-class TestLLMConfig:
-    """Test LLM configuration class."""
+# Literal error messages, escaped and compiled once for pytest.raises(match=...)
+_UNSUPPORTED_PROVIDER = re.compile(re.escape("Unsupported provider"))
+_INVALID_LLM_PROVIDER = re.compile(re.escape("Invalid LLM_PROVIDER"))
+
+
+_P_ANTH, _P_VERTEX, _P_BED = CloudProvider.ANTHROPIC, CloudProvider.VERTEX_AI, CloudProvider.BEDROCK
+
+# Minimal valid config per provider; frozen, so tests share them and derive variants with replace()
+_VALID_CFGS = {
+    _P_ANTH: LLMConfig(provider=_P_ANTH, model="claude-3-sonnet-20240229", api_key="test-key"),
+    _P_VERTEX: LLMConfig(provider=_P_VERTEX, model="claude-3-sonnet-20240229",
+                         project_id="test-project", region="us-central1"),
+    _P_BED: LLMConfig(provider=_P_BED, model="claude-3-sonnet-20240229", aws_region="us-east-1"),
+}
+
+
+# (provider for the indirect mock_sdk fixture, expected SDK constructor kwargs for its _VALID_CFGS entry)
+CREATE_CASES = [
+    ("anthropic", {"api_key": "test-key"}),
+    ("vertex", {"region": "us-central1", "project_id": "test-project"}),
+    ("bedrock", {"aws_region": "us-east-1"}),
+]
+
+# ((provider, environment) for the indirect env_client fixture, expected SDK constructor kwargs)
+ENV_CASES = [
+    (("anthropic",
+      {"LLM_PROVIDER": "anthropic", "ANTHROPIC_API_KEY": "test-key", "CLAUDE_MODEL": "claude-3-sonnet-20240229"}),
+     {"api_key": "test-key"}),
+    (("vertex",
+      {"LLM_PROVIDER": "vertex", "GOOGLE_CLOUD_PROJECT": "test-project",
+       "GOOGLE_CLOUD_REGION": "us-central1", "CLAUDE_MODEL": "claude-3-sonnet-20240229"}),
+     {"region": "us-central1", "project_id": "test-project"}),
+    (("bedrock",
+      {"LLM_PROVIDER": "bedrock", "AWS_REGION": "us-west-2", "CLAUDE_MODEL": "claude-3-sonnet-20240229"}),
+     {"aws_region": "us-west-2"}),
+]
+
+# (config, expected validity, expected error fragment)
+VALIDATE_CASES = [
+    (_VALID_CFGS[_P_ANTH], True, ""),
+    (replace(_VALID_CFGS[_P_ANTH], api_key=None), False, "API key is required"),
+    (_VALID_CFGS[_P_VERTEX], True, ""),
+    (replace(_VALID_CFGS[_P_VERTEX], project_id=None), False, "project ID is required"),
+    (_VALID_CFGS[_P_BED], True, ""),
+]
+
+
+# LLM configuration
+
+def test_config_creation():
+    """Test basic config creation."""
+    config = LLMConfig(
+        provider=_P_ANTH,
+        model="claude-3-sonnet-20240229",
+        api_key="test-key"
+    )
     
-    def test_config_creation(self):
-        """Test basic config creation."""
-        config = LLMConfig(
-            provider=CloudProvider.ANTHROPIC,
-            model="claude-3-sonnet-20240229",
-            api_key="test-key"
-        )
-        
-        assert config.provider == CloudProvider.ANTHROPIC
-        assert config.model == "claude-3-sonnet-20240229"
-        assert config.api_key == "test-key"
-        assert config.timeout_seconds == 180  # default
-        assert config.max_retries == 3  # default
-
-
-class TestLLMClientFactory:
-    """Test LLM client factory."""
-    
-    @patch('claudecode.anthropic_client.Anthropic')
-    def test_create_anthropic_client(self, mock_anthropic):
-        """Test creating Anthropic client."""
-        config = LLMConfig(
-            provider=CloudProvider.ANTHROPIC,
-            model="claude-3-sonnet-20240229",
-            api_key="test-key"
-        )
-        
-        client = LLMClientFactory.create_client(config)
-        
-        assert client is not None
-        assert client.provider_name == "anthropic"
-        mock_anthropic.assert_called_once_with(api_key="test-key")
-    
-    @patch('claudecode.vertex_client.AnthropicVertex')
-    def test_create_vertex_client(self, mock_vertex):
-        """Test creating Vertex AI client."""
-        config = LLMConfig(
-            provider=CloudProvider.VERTEX_AI,
-            model="claude-3-sonnet-20240229",
-            project_id="test-project",
-            region="us-central1"
-        )
-        
-        client = LLMClientFactory.create_client(config)
-        
-        assert client is not None
-        assert client.provider_name == "vertex"
-        mock_vertex.assert_called_once_with(
-            region="us-central1",
-            project_id="test-project"
-        )
+    assert config.provider == _P_ANTH
+    assert config.model == "claude-3-sonnet-20240229"
+    assert config.api_key == "test-key"
+    assert config.timeout_seconds == 180  # default
+    assert config.max_retries == 3  # default
+    assert config.pool_max_connections == 32  # default
+    assert config.pool_max_keepalive == 16  # default
+    assert config.pool_keepalive_expiry == 90.0  # default
+
+
+def test_config_is_frozen_and_hashable():
+    """Test that configs are immutable and usable as dict keys."""
+    config = _VALID_CFGS[_P_ANTH]
     
-    @patch('claudecode.bedrock_client.AnthropicBedrock')
-    def test_create_bedrock_client(self, mock_bedrock):
-        """Test creating Bedrock client."""
-        config = LLMConfig(
-            provider=CloudProvider.BEDROCK,
-            model="claude-3-sonnet-20240229",
-            aws_region="us-east-1"
-        )
-        
-        client = LLMClientFactory.create_client(config)
-        
-        assert client is not None
-        assert client.provider_name == "bedrock"
-        mock_bedrock.assert_called_once_with(aws_region="us-east-1")
-    
-    def test_create_client_invalid_provider(self):
-        """Test creating client with invalid provider."""
-        config = LLMConfig(
+    with pytest.raises(FrozenInstanceError):
+        config.model = "other-model"
+    assert {config: "client"}[LLMConfig(provider=_P_ANTH, model="claude-3-sonnet-20240229", api_key="test-key")] == "client"
+    assert replace(config, model="other-model").model == "other-model"
+
+
+def test_config_accepts_provider_name():
+    """Test that provider names are normalized to CloudProvider."""
+    config = LLMConfig(provider="Vertex", model="claude-3-sonnet-20240229")  # type: ignore
+    
+    assert config.provider is _P_VERTEX
+
+
+@pytest.mark.parametrize("overrides", [
+    {"timeout_seconds": 0},
+    {"max_retries": -1},
+    {"pool_max_connections": 0},
+    {"requests_per_minute": -5},
+])
+def test_config_rejects_out_of_range_values(overrides):
+    """Test that invalid numeric settings fail at construction time."""
+    with pytest.raises(ValueError):
+        replace(_VALID_CFGS[_P_ANTH], **overrides)
+
+
+# Client factory
+
+@pytest.fixture
+def mock_sdk(request):
+    """Patched SDK client class for the provider given by indirect parametrization."""
+    provider = request.param
+    return provider, request.getfixturevalue(f"mock_{provider}")
+
+
+@pytest.mark.parametrize("mock_sdk, expected_call_kwargs", CREATE_CASES,
+                         indirect=["mock_sdk"], ids=[case[0] for case in CREATE_CASES])
+def test_create_client(mock_sdk, expected_call_kwargs):
+    """Test creating a client for each provider."""
+    provider, sdk_class = mock_sdk
+    
+    client = LLMClientFactory.create_client(_VALID_CFGS[CloudProvider(provider)])
+    
+    assert client.provider_name == provider
+    sdk_class.assert_called_once_with(**expected_call_kwargs, http_client=ANY)
+
+
+def test_every_provider_has_a_builder():
+    """Test that the dispatch table covers every CloudProvider."""
+    assert set(_CLIENT_BUILDERS) == set(CloudProvider)
+
+
+def test_create_client_invalid_provider():
+    """Test that an invalid provider is rejected when the config is built."""
+    with pytest.raises(ValueError, match=_UNSUPPORTED_PROVIDER):
+        LLMConfig(
             provider="invalid",  # type: ignore
             model="claude-3-sonnet-20240229"
         )
-        
-        with pytest.raises(ValueError, match="Unsupported provider"):
-            LLMClientFactory.create_client(config)
-    
-    def test_create_client_from_dict_anthropic(self):
-        """Test creating client from dictionary for Anthropic."""
-        with patch('claudecode.anthropic_client.Anthropic'):
-            client = LLMClientFactory.create_client_from_dict(
-                provider="anthropic",
-                model="claude-3-sonnet-20240229",
-                api_key="test-key"
-            )
-            
-            assert client.provider_name == "anthropic"
-    
-    def test_create_client_from_dict_invalid_provider(self):
-        """Test creating client from dictionary with invalid provider."""
-        with pytest.raises(ValueError, match="Unsupported provider"):
-            LLMClientFactory.create_client_from_dict(
-                provider="invalid",
-                model="claude-3-sonnet-20240229"
-            )
-    
-    @patch.dict(os.environ, {
-        'LLM_PROVIDER': 'anthropic',
-        'ANTHROPIC_API_KEY': 'test-key',
-        'CLAUDE_MODEL': 'claude-3-sonnet-20240229'
-    })
-    @patch('claudecode.anthropic_client.Anthropic')
-    def test_from_environment_anthropic(self, mock_anthropic):
-        """Test creating client from environment variables for Anthropic."""
-        client = LLMClientFactory.from_environment()
-        
-        assert client.provider_name == "anthropic"
-        mock_anthropic.assert_called_once_with(api_key="test-key")
-    
-    @patch.dict(os.environ, {
-        'LLM_PROVIDER': 'vertex',
-        'GOOGLE_CLOUD_PROJECT': 'test-project',
-        'GOOGLE_CLOUD_REGION': 'us-central1',
-        'CLAUDE_MODEL': 'claude-3-sonnet-20240229'
-    })
-    @patch('claudecode.vertex_client.AnthropicVertex')
-    def test_from_environment_vertex(self, mock_vertex):
-        """Test creating client from environment variables for Vertex AI."""
-        client = LLMClientFactory.from_environment()
-        
-        assert client.provider_name == "vertex"
-        mock_vertex.assert_called_once_with(
-            region="us-central1",
-            project_id="test-project"
+
+
+@pytest.mark.usefixtures("mock_anthropic")
+def test_create_client_from_dict_anthropic():
+    """Test creating client from dictionary for Anthropic."""
+    client = LLMClientFactory.create_client_from_dict(
+        provider="anthropic",
+        model="claude-3-sonnet-20240229",
+        api_key="test-key"
+    )
+    
+    assert client.provider_name == "anthropic"
+
+
+def test_create_client_from_dict_invalid_provider():
+    """Test creating client from dictionary with invalid provider."""
+    with pytest.raises(ValueError, match=_UNSUPPORTED_PROVIDER):
+        LLMClientFactory.create_client_from_dict(
+            provider="invalid",
+            model="claude-3-sonnet-20240229"
         )
+
+
+@pytest.fixture
+def env_client(monkeypatch, request):
+    """Client from from_environment() for the (provider, environment) given by indirect parametrization."""
+    provider, env = request.param
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    sdk_class = request.getfixturevalue(f"mock_{provider}")
+    return provider, LLMClientFactory.from_environment(), sdk_class
+
+
+@pytest.mark.parametrize("env_client, expected_call_kwargs", ENV_CASES,
+                         indirect=["env_client"], ids=[case[0][0] for case in ENV_CASES])
+def test_from_environment(env_client, expected_call_kwargs):
+    """Test creating a client from environment variables for each provider."""
+    provider, client, sdk_class = env_client
+    
+    assert client.provider_name == provider
+    sdk_class.assert_called_once_with(**expected_call_kwargs, http_client=ANY)
+
+
+def test_from_environment_invalid_provider(monkeypatch):
+    """Test creating client from environment with invalid provider."""
+    monkeypatch.setenv("LLM_PROVIDER", "invalid")
     
-    @patch.dict(os.environ, {
-        'LLM_PROVIDER': 'bedrock',
-        'AWS_REGION': 'us-west-2',
-        'CLAUDE_MODEL': 'claude-3-sonnet-20240229'
+    with pytest.raises(ValueError, match=_INVALID_LLM_PROVIDER):
+        LLMClientFactory.from_environment()
+
+
+def test_from_environment_explicit_mapping(monkeypatch, mock_anthropic):
+    """Test that an explicit environment mapping is used instead of os.environ."""
+    monkeypatch.setenv("LLM_PROVIDER", "invalid")
+    
+    client = LLMClientFactory.from_environment({
+        'ANTHROPIC_API_KEY': 'mapped-key',
+        'LLM_TIMEOUT_SECONDS': '45',
+        'LLM_REQUESTS_PER_MINUTE': '0'
     })
-    @patch('claudecode.bedrock_client.AnthropicBedrock')
-    def test_from_environment_bedrock(self, mock_bedrock):
-        """Test creating client from environment variables for Bedrock."""
-        client = LLMClientFactory.from_environment()
-        
-        assert client.provider_name == "bedrock"
-        mock_bedrock.assert_called_once_with(aws_region="us-west-2")
-    
-    @patch.dict(os.environ, {'LLM_PROVIDER': 'invalid'})
-    def test_from_environment_invalid_provider(self):
-        """Test creating client from environment with invalid provider."""
-        with pytest.raises(ValueError, match="Invalid LLM_PROVIDER"):
-            LLMClientFactory.from_environment()
-    
-    def test_get_supported_providers(self):
-        """Test getting list of supported providers."""
-        providers = LLMClientFactory.get_supported_providers()
-        
-        assert "anthropic" in providers
-        assert "vertex" in providers
-        assert "bedrock" in providers
-        assert len(providers) == 3
-    
-    def test_validate_config_anthropic_valid(self):
-        """Test validating valid Anthropic config."""
-        config = LLMConfig(
-            provider=CloudProvider.ANTHROPIC,
-            model="claude-3-sonnet-20240229",
-            api_key="test-key"
-        )
-        
-        is_valid, error = LLMClientFactory.validate_config(config)
-        
-        assert is_valid
-        assert error == ""
     
-    def test_validate_config_anthropic_invalid(self):
-        """Test validating invalid Anthropic config."""
-        config = LLMConfig(
-            provider=CloudProvider.ANTHROPIC,
-            model="claude-3-sonnet-20240229"
-            # Missing api_key
-        )
-        
-        is_valid, error = LLMClientFactory.validate_config(config)
-        
-        assert not is_valid
-        assert "API key is required" in error
-    
-    def test_validate_config_vertex_valid(self):
-        """Test validating valid Vertex AI config."""
-        config = LLMConfig(
-            provider=CloudProvider.VERTEX_AI,
-            model="claude-3-sonnet-20240229",
-            project_id="test-project",
-            region="us-central1"
-        )
-        
-        is_valid, error = LLMClientFactory.validate_config(config)
-        
-        assert is_valid
-        assert error == ""
+    assert client.provider_name == "anthropic"
+    assert client.timeout_seconds == 45
+    assert client.rate_limiter is None
+    mock_anthropic.assert_called_once_with(api_key="mapped-key", http_client=ANY)
+
+
+def test_from_environment_invalid_integer():
+    """Test that non-numeric integer settings are rejected."""
+    with pytest.raises(ValueError):
+        LLMClientFactory.from_environment({'LLM_MAX_RETRIES': 'three'})
+
+
+def test_get_supported_providers():
+    """Test getting list of supported providers."""
+    providers = LLMClientFactory.get_supported_providers()
     
-    def test_validate_config_vertex_invalid(self):
-        """Test validating invalid Vertex AI config."""
-        config = LLMConfig(
-            provider=CloudProvider.VERTEX_AI,
-            model="claude-3-sonnet-20240229"
-            # Missing project_id and region
-        )
-        
-        is_valid, error = LLMClientFactory.validate_config(config)
-        
-        assert not is_valid
-        assert "project ID is required" in error
-    
-    def test_validate_config_bedrock_valid(self):
-        """Test validating valid Bedrock config."""
-        config = LLMConfig(
-            provider=CloudProvider.BEDROCK,
-            model="claude-3-sonnet-20240229",
-            aws_region="us-east-1"
-        )
-        
-        is_valid, error = LLMClientFactory.validate_config(config)
-        
-        assert is_valid
+    assert "anthropic" in providers
+    assert "vertex" in providers
+    assert "bedrock" in providers
+    assert len(providers) == 3
+
+
+@pytest.mark.usefixtures("mock_anthropic")
+def test_create_client_from_dict_is_case_insensitive():
+    """Test that provider names are matched case-insensitively."""
+    client = LLMClientFactory.create_client_from_dict(provider="Anthropic", api_key="test-key")
+    
+    assert client.provider_name == "anthropic"
+
+
+@pytest.mark.parametrize("config, expected_valid, expected_error", VALIDATE_CASES,
+                         ids=["anthropic-valid", "anthropic-missing-key", "vertex-valid",
+                              "vertex-missing-project", "bedrock-valid"])
+def test_validate_config(config, expected_valid, expected_error):
+    """Test validating provider-specific config requirements."""
+    is_valid, error = LLMClientFactory.validate_config(config)
+    
+    assert is_valid is expected_valid
+    assert expected_error in error
+    if expected_valid:
         assert error == ""
 
 
-class TestConvenienceFunctions:
-    """Test convenience functions."""
+# Lazy provider imports
+
+def test_factory_import_does_not_load_provider_sdks():
+    """Test that importing the factory leaves all provider SDKs unloaded."""
+    code = (
+        "import sys, claudecode.llm_client_factory; "
+        "loaded = [m for m in ('anthropic', 'boto3', 'google.auth', "
+        "'claudecode.anthropic_client', 'claudecode.vertex_client', "
+        "'claudecode.bedrock_client') if m in sys.modules]; "
+        "print(','.join(loaded))"
+    )
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True,
+        cwd=project_root, check=True
+    )
     
-    @patch('claudecode.anthropic_client.Anthropic')
-    def test_get_llm_client(self, mock_anthropic):
-        """Test get_llm_client convenience function."""
-        client = get_llm_client(
-            provider="anthropic",
-            model="claude-3-sonnet-20240229",
-            api_key="test-key"
-        )
-        
-        assert client.provider_name == "anthropic"
-        mock_anthropic.assert_called_once_with(api_key="test-key")
+    assert result.stdout.strip() == ""
+
+
+def test_provider_loader_is_cached():
+    """Test that a provider loader returns the same client class every call."""
+    from claudecode.llm_client_factory import _load_vertex_client
+    from claudecode.vertex_client import VertexAIClient
     
-    @patch.dict(os.environ, {
-        'LLM_PROVIDER': 'anthropic',
-        'ANTHROPIC_API_KEY': 'test-key'
-    })
-    @patch('claudecode.anthropic_client.Anthropic')
-    def test_get_client_from_env(self, mock_anthropic):
-        """Test get_client_from_env convenience function."""
-        client = get_client_from_env()
-        
-        assert client.provider_name == "anthropic"
-        mock_anthropic.assert_called_once_with(api_key="test-key")
-    
-    @patch('claudecode.anthropic_client.Anthropic')
-    def test_get_claude_api_client_multi_provider_explicit(self, mock_anthropic):
-        """Test backward compatibility function with explicit provider."""
-        client = get_claude_api_client_multi_provider(
-            model="claude-3-sonnet-20240229",
-            api_key="test-key",
-            provider="anthropic"
-        )
-        
-        assert client.provider_name == "anthropic"
-        mock_anthropic.assert_called_once_with(api_key="test-key")
-    
-    @patch.dict(os.environ, {'LLM_PROVIDER': 'vertex', 'GOOGLE_CLOUD_PROJECT': 'test-project'})
-    @patch('claudecode.vertex_client.AnthropicVertex')
-    def test_get_claude_api_client_multi_provider_env(self, mock_vertex):
-        """Test backward compatibility function with environment provider."""
-        client = get_claude_api_client_multi_provider(
-            model="claude-3-sonnet-20240229"
-        )
-        
-        assert client.provider_name == "vertex"
-    
-    @patch('claudecode.anthropic_client.Anthropic')
-    def test_get_claude_api_client_multi_provider_default(self, mock_anthropic):
-        """Test backward compatibility function defaults to Anthropic."""
-        with patch.dict(os.environ, {}, clear=True):
-            client = get_claude_api_client_multi_provider(
-                model="claude-3-sonnet-20240229",
-                api_key="test-key"
-            )
-            
-            assert client.provider_name == "anthropic"
-            mock_anthropic.assert_called_once_with(api_key="test-key")
-
-
-if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    assert _load_vertex_client() is VertexAIClient
+    assert _load_vertex_client() is _load_vertex_client()
+
+
+# Process-wide client cache
+
+def test_same_config_returns_cached_client(mock_anthropic):
+    """Test that equivalent configs share a single client instance."""
+    config = _VALID_CFGS[_P_ANTH]
+    
+    first = LLMClientFactory.create_client(config)
+    second = LLMClientFactory.create_client(replace(config))
+    
+    assert first is second
+    mock_anthropic.assert_called_once()
+
+
+def test_different_config_returns_new_client(mock_anthropic):
+    """Test that distinct configs get distinct clients."""
+    first = get_llm_client(provider="anthropic", api_key="key-one")
+    second = get_llm_client(provider="anthropic", api_key="key-two")
+    
+    assert first is not second
+    assert mock_anthropic.call_count == 2
+
+
+def test_clear_client_cache_closes_clients(mock_anthropic):
+    """Test that clearing the cache closes and drops cached clients."""
+    first = get_llm_client(provider="anthropic", api_key="test-key")
+    sdk_client = mock_anthropic.return_value
+    
+    clear_client_cache()
+    second = get_llm_client(provider="anthropic", api_key="test-key")
+    
+    sdk_client.close.assert_called()
+    assert first is not second
+
+
+def test_shared_client_survives_close(mock_anthropic):
+    """Test that closing a shared client (e.g. via with) leaves it usable for other holders."""
+    holder = get_llm_client(provider="anthropic", api_key="test-key")
+    with get_llm_client(provider="anthropic", api_key="test-key") as first:
+        pass
+    first.close()
+    second = get_llm_client(provider="anthropic", api_key="test-key")
+    
+    assert first is holder and second is holder
+    assert holder.client is mock_anthropic.return_value
+    mock_anthropic.return_value.close.assert_not_called()
+    assert mock_anthropic.call_count == 1
+
+
+def test_client_built_outside_cache_lock(mock_anthropic):
+    """Test that SDK construction does not hold the shared client cache lock."""
+    from claudecode.llm_client_factory import _CLIENT_CACHE_LOCK
+    
+    lock_held = []
+    mock_anthropic.side_effect = lambda **kwargs: lock_held.append(_CLIENT_CACHE_LOCK.locked()) or Mock()
+    get_llm_client(provider="anthropic", api_key="test-key")
+    
+    assert lock_held == [False]
+
+
+def test_concurrent_build_keeps_first_cached_client(mock_anthropic):
+    """Test that a client built while another thread won the race is closed, not cached."""
+    from claudecode.llm_client_factory import _CLIENT_CACHE
+    
+    config = _VALID_CFGS[_P_ANTH]
+    winner = LLMClientFactory._build_client(config)
+    loser = LLMClientFactory._build_client(config)
+    
+    def build_while_other_thread_wins(config):
+        _CLIENT_CACHE[_client_cache_key(config)] = winner
+        return loser
+    
+    with patch.object(LLMClientFactory, '_build_client', side_effect=build_while_other_thread_wins):
+        assert LLMClientFactory.create_client(config) is winner
+    assert LLMClientFactory.create_client(config) is winner
+    
+    assert loser._shared is False
+    assert loser.client is None
+    assert winner.client is not None
+
+
+def test_client_uses_pooled_http_client(mock_anthropic):
+    """Test that the factory injects a tuned HTTP client and closes it with the cache."""
+    http_client = Mock()
+    config = replace(_VALID_CFGS[_P_ANTH], pool_max_connections=8)
+    
+    with patch.object(LLMClientFactory, '_build_http_client', return_value=http_client) as mock_build:
+        client = LLMClientFactory.create_client(config)
+    
+    mock_build.assert_called_once_with(config)
+    mock_anthropic.assert_called_once_with(api_key="test-key", http_client=http_client)
+    
+    client.close()
+    http_client.close.assert_not_called()
+    clear_client_cache()
+    http_client.close.assert_called_once()
+
+
+@pytest.mark.parametrize("mock_sdk", ["anthropic", "vertex", "bedrock"], indirect=True)
+def test_http_client_closed_when_client_build_fails(mock_sdk):
+    """Test that a failing SDK constructor does not leak the pooled HTTP client."""
+    provider, sdk_class = mock_sdk
+    sdk_class.side_effect = RuntimeError("bad credentials")
+    http_client = Mock()
+    
+    with patch.object(LLMClientFactory, '_build_http_client', return_value=http_client):
+        with pytest.raises(Exception, match="bad credentials"):
+            LLMClientFactory.create_client(_VALID_CFGS[CloudProvider(provider)])
+    
+    http_client.close.assert_called_once()
+
+
+def test_http2_enabled_when_h2_installed():
+    """Test that HTTP/2 is requested only when configured and h2 is available."""
+    config = _VALID_CFGS[_P_ANTH]
+    
+    with patch('claudecode.llm_client_factory._h2_available', return_value=True):
+        assert LLMClientFactory._http_client_options(config)["http2"] is True
+        assert LLMClientFactory._http_client_options(replace(config, http2=False))["http2"] is False
+    with patch('claudecode.llm_client_factory._h2_available', return_value=False):
+        assert LLMClientFactory._http_client_options(config)["http2"] is False
+
+
+def test_http2_falls_back_without_h2():
+    """Test that the HTTP client still builds when h2 is not installed."""
+    config = _VALID_CFGS[_P_ANTH]
+    
+    with patch('claudecode.llm_client_factory._h2_available', return_value=False):
+        http_client = LLMClientFactory._build_http_client(config)
+    
+    http_client.close()
+
+
+@pytest.mark.usefixtures("mock_anthropic")
+def test_prewarm_on_first_creation_only():
+    """Test that a new client is pre-warmed once, and not when prewarm is off."""
+    with patch('claudecode.llm_client_base.LLMAPIClient.prewarm') as mock_prewarm:
+        get_llm_client(provider="anthropic", api_key="test-key")
+        get_llm_client(provider="anthropic", api_key="test-key")
+        LLMClientFactory.create_client(replace(_VALID_CFGS[_P_ANTH], prewarm=False))
+    
+    mock_prewarm.assert_called_once()
+
+
+@pytest.mark.usefixtures("mock_anthropic")
+def test_rate_limiter_attached_per_provider():
+    """Test that clients of one provider share a rate limiter, which is off by default."""
+    first = get_llm_client(provider="anthropic", api_key="key-one", requests_per_minute=50)
+    second = get_llm_client(provider="anthropic", api_key="key-two", requests_per_minute=50)
+    unlimited = get_llm_client(provider="anthropic", api_key="key-three")
+    
+    assert first.rate_limiter is not None
+    assert first.rate_limiter is second.rate_limiter
+    assert unlimited.rate_limiter is None
+
+
+def test_cache_key_does_not_contain_api_key():
+    """Test that the raw API key never appears in the cache key."""
+    config = replace(_VALID_CFGS[_P_ANTH], api_key="super-secret-key")
+    
+    key = _client_cache_key(config)
+    
+    assert key.api_key != "super-secret-key"
+    assert hash(key) == hash(_client_cache_key(config))
+
+
+# Convenience functions
+
+def test_get_llm_client(mock_anthropic):
+    """Test get_llm_client convenience function."""
+    client = get_llm_client(
+        provider="anthropic",
+        model="claude-3-sonnet-20240229",
+        api_key="test-key"
+    )
+    
+    assert client.provider_name == "anthropic"
+    mock_anthropic.assert_called_once_with(api_key="test-key", http_client=ANY)
+
+
+def test_get_client_from_env(monkeypatch, mock_anthropic):
+    """Test get_client_from_env convenience function."""
+    monkeypatch.setenv("LLM_PROVIDER", "anthropic")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    
+    client = get_client_from_env()
+    
+    assert client.provider_name == "anthropic"
+    mock_anthropic.assert_called_once_with(api_key="test-key", http_client=ANY)
+
+
+def test_get_claude_api_client_multi_provider_explicit(mock_anthropic):
+    """Test backward compatibility function with explicit provider."""
+    client = get_claude_api_client_multi_provider(
+        model="claude-3-sonnet-20240229",
+        api_key="test-key",
+        provider="anthropic"
+    )
+    
+    assert client.provider_name == "anthropic"
+    mock_anthropic.assert_called_once_with(api_key="test-key", http_client=ANY)
+
+
+@pytest.mark.usefixtures("mock_vertex")
+def test_get_claude_api_client_multi_provider_env(monkeypatch):
+    """Test backward compatibility function with environment provider."""
+    monkeypatch.setenv("LLM_PROVIDER", "vertex")
+    monkeypatch.setenv("GOOGLE_CLOUD_PROJECT", "test-project")
+    
+    client = get_claude_api_client_multi_provider(
+        model="claude-3-sonnet-20240229"
+    )
+    
+    assert client.provider_name == "vertex"
+
+
+def test_get_claude_api_client_multi_provider_default(monkeypatch, mock_anthropic):
+    """Test backward compatibility function defaults to Anthropic."""
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    
+    client = get_claude_api_client_multi_provider(
+        model="claude-3-sonnet-20240229",
+        api_key="test-key"
+    )
+    
+    assert client.provider_name == "anthropic"
+    mock_anthropic.assert_called_once_with(api_key="test-key", http_client=ANY)
+
+
+@pytest.mark.usefixtures("mock_anthropic")
+def test_default_model_read_on_first_use(monkeypatch):
+    """Test that CLAUDE_MODEL set after import still becomes the default model."""
+    monkeypatch.setenv("CLAUDE_MODEL", "claude-3-haiku-20240307")
+    default_claude_model.cache_clear()
+    
+    client = get_llm_client(provider="anthropic", api_key="test-key")
+    
+    assert client.model == 'claude-3-haiku-20240307'
+
+
+def test_default_model_fallback(monkeypatch):
+    """Test the built-in default when CLAUDE_MODEL is unset."""
+    monkeypatch.delenv("CLAUDE_MODEL", raising=False)
+    default_claude_model.cache_clear()
+    
+    assert default_claude_model() == DEFAULT_CLAUDE_MODEL
@@ -1,268 +1,721 @@
 """Tests for individual LLM client implementations."""
 
+import asyncio
+import json
+import pkgutil
+import re
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, Mock, MagicMock, AsyncMock
 
-from claudecode.anthropic_client import AnthropicAPIClient
-from claudecode.vertex_client import VertexAIClient
-from claudecode.bedrock_client import BedrockClient
+from claudecode.llm_cache import SemanticPromptCache
 
 
-class TestAnthropicClient:
-    """Test Anthropic API client."""
+# Read-only finding and PR context shared by the interface tests
+_FINDING = {"file": "test.py", "line": 10, "severity": "HIGH", "description": "Test finding"}
+_CONTEXT = {"repo_name": "test/repo", "pr_number": 123}
+
+# Literal error messages, escaped and compiled once for pytest.raises(match=...)
+_NO_API_KEY = re.compile(re.escape("No Anthropic API key found"))
+_NO_PROJECT_ID = re.compile(re.escape("No Google Cloud project ID found"))
+
+
+@pytest.fixture
+def mock_response():
+    """Fresh SDK response whose single content block reads "Test response"."""
+    response = Mock()
+    response.content = [Mock(text="Test response")]
+    return response
+
+
+@pytest.fixture
+def AnthropicAPIClient(mock_anthropic):
+    """Anthropic client class, imported on first use and backed by the patched SDK."""
+    from claudecode.anthropic_client import AnthropicAPIClient
+    return AnthropicAPIClient
+
+
+@pytest.fixture
+def VertexAIClient(mock_vertex):
+    """Vertex AI client class, imported on first use and backed by the patched SDK."""
+    from claudecode.vertex_client import VertexAIClient
+    return VertexAIClient
+
+
+@pytest.fixture
+def BedrockClient(mock_bedrock):
+    """Bedrock client class, imported on first use and backed by the patched SDK."""
+    from claudecode.bedrock_client import BedrockClient
+    return BedrockClient
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep(monkeypatch):
+    """Make retry backoff return immediately; tests that check the delay patch time.sleep themselves."""
+    monkeypatch.setattr("claudecode.llm_client_base.time.sleep", lambda *_: None)
+
+
+@pytest.fixture(scope="module")
+def all_clients(_patch_sdks):
+    """One client per provider, built against the patched SDKs and shared by the interface tests."""
+    from claudecode.anthropic_client import AnthropicAPIClient
+    from claudecode.vertex_client import VertexAIClient
+    from claudecode.bedrock_client import BedrockClient
     
-    @patch('claudecode.anthropic_client.Anthropic')
-    def test_init_with_api_key(self, mock_anthropic_class):
-        """Test initialization with API key."""
-        client = AnthropicAPIClient(
-            model="claude-3-sonnet-20240229",
-            api_key="test-key"
-        )
-        
-        assert client.model == "claude-3-sonnet-20240229"
-        assert client.api_key == "test-key"
-        assert client.provider_name == "anthropic"
-        mock_anthropic_class.assert_called_once_with(api_key="test-key")
-    
-    def test_init_missing_api_key(self):
-        """Test initialization without API key raises error."""
-        with patch.dict('os.environ', {}, clear=True):
-            with pytest.raises(ValueError, match="No Anthropic API key found"):
-                AnthropicAPIClient(model="claude-3-sonnet-20240229")
-    
-    @patch('claudecode.anthropic_client.Anthropic')
-    def test_validate_api_access_success(self, mock_anthropic_class):
-        """Test successful API validation."""
-        mock_client = MagicMock()
-        mock_anthropic_class.return_value = mock_client
-        
-        client = AnthropicAPIClient(api_key="test-key")
-        success, error = client.validate_api_access()
-        
-        assert success
-        assert error == ""
-        mock_client.messages.create.assert_called_once()
-    
-    @patch('claudecode.anthropic_client.Anthropic')
-    def test_validate_api_access_failure(self, mock_anthropic_class):
-        """Test failed API validation."""
-        mock_client = MagicMock()
-        mock_client.messages.create.side_effect = Exception("API Error")
-        mock_anthropic_class.return_value = mock_client
-        
-        client = AnthropicAPIClient(api_key="test-key")
-        success, error = client.validate_api_access()
-        
-        assert not success
-        assert "API validation failed" in error
-    
-    @patch('claudecode.anthropic_client.Anthropic')
-    def test_call_with_retry_success(self, mock_anthropic_class):
-        """Test successful API call."""
-        # Setup mock response
-        mock_content = MagicMock()
-        mock_content.text = "Test response"
-        mock_response = MagicMock()
-        mock_response.content = [mock_content]
-        
-        mock_client = MagicMock()
-        mock_client.messages.create.return_value = mock_response
-        mock_anthropic_class.return_value = mock_client
-        
-        client = AnthropicAPIClient(api_key="test-key")
-        success, response, error = client.call_with_retry("Test prompt")
-        
-        assert success
-        assert response == "Test response"
-        assert error == ""
-    
-    @patch('claudecode.anthropic_client.Anthropic')
-    def test_call_with_retry_failure(self, mock_anthropic_class):
-        """Test failed API call with retries."""
-        mock_client = MagicMock()
-        mock_client.messages.create.side_effect = Exception("API Error")
-        mock_anthropic_class.return_value = mock_client
-        
-        client = AnthropicAPIClient(api_key="test-key", max_retries=1)
-        success, response, error = client.call_with_retry("Test prompt")
-        
-        assert not success
-        assert response == ""
-        assert "API call failed after" in error
-
-
-class TestVertexAIClient:
-    """Test Vertex AI client."""
-    
-    @patch('claudecode.vertex_client.AnthropicVertex')
-    def test_init_with_project(self, mock_vertex_class):
-        """Test initialization with project ID."""
-        client = VertexAIClient(
-            model="claude-3-sonnet-20240229",
-            project_id="test-project",
-            region="us-central1"
-        )
+    clients = (
+        AnthropicAPIClient(api_key="test-key"),
+        VertexAIClient(project_id="test-project"),
+        BedrockClient(aws_region="us-east-1")
+    )
+    yield clients
+    for client in clients:
+        client.close()
+
+
+# Anthropic API client
+
+def test_init_with_api_key(AnthropicAPIClient, mock_anthropic):
+    """Test initialization with API key."""
+    client = AnthropicAPIClient(
+        model="claude-3-sonnet-20240229",
+        api_key="test-key"
+    )
+    
+    assert client.model == "claude-3-sonnet-20240229"
+    assert client.api_key == "test-key"
+    assert client.provider_name == "anthropic"
+    mock_anthropic.assert_called_once_with(api_key="test-key")
+
+
+def test_init_missing_api_key(monkeypatch, AnthropicAPIClient):
+    """Test initialization without API key raises error."""
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    
+    with pytest.raises(ValueError, match=_NO_API_KEY):
+        AnthropicAPIClient(model="claude-3-sonnet-20240229")
+
+
+def test_validate_api_access_success(AnthropicAPIClient, mock_anthropic):
+    """Test successful API validation."""
+    mock_client = Mock()
+    mock_anthropic.return_value = mock_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    success, error = client.validate_api_access()
+    
+    assert success
+    assert error == ""
+    mock_client.messages.create.assert_called_once()
+
+
+def test_validate_api_access_failure(AnthropicAPIClient, mock_anthropic):
+    """Test failed API validation."""
+    mock_client = Mock()
+    mock_client.messages.create.side_effect = Exception("API Error")
+    mock_anthropic.return_value = mock_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    success, error = client.validate_api_access()
+    
+    assert not success
+    assert "API validation failed" in error
+
+
+def test_call_with_retry_success(mock_response, AnthropicAPIClient, mock_anthropic):
+    """Test successful API call."""
+    mock_client = Mock()
+    mock_client.messages.create.return_value = mock_response
+    mock_anthropic.return_value = mock_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    success, response, error = client.call_with_retry("Test prompt")
+    
+    assert success
+    assert response == "Test response"
+    assert error == ""
+
+
+def test_call_with_retry_failure(AnthropicAPIClient, mock_anthropic):
+    """Test failed API call with retries."""
+    mock_client = Mock()
+    mock_client.messages.create.side_effect = Exception("API Error")
+    mock_anthropic.return_value = mock_client
+    
+    client = AnthropicAPIClient(api_key="test-key", max_retries=1)
+    success, response, error = client.call_with_retry("Test prompt")
+    
+    assert not success
+    assert response == ""
+    assert "API call failed after" in error
+
+
+def test_call_with_retry_caches_identical_requests(mock_response, AnthropicAPIClient, mock_anthropic):
+    """Test that identical requests are answered from the exact-match cache."""
+    mock_client = Mock()
+    mock_client.messages.create.return_value = mock_response
+    mock_anthropic.return_value = mock_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    first = client.call_with_retry("Test prompt", system_prompt="System")
+    second = client.call_with_retry("Test prompt", system_prompt="System")
+    client.call_with_retry("Other prompt", system_prompt="System")
+    
+    assert first == second == (True, "Test response", "")
+    assert mock_client.messages.create.call_count == 2
+
+
+def test_call_with_retry_does_not_cache_failures(AnthropicAPIClient, mock_anthropic):
+    """Test that failed requests are retried on the next call."""
+    mock_client = Mock()
+    mock_client.messages.create.side_effect = Exception("API Error")
+    mock_anthropic.return_value = mock_client
+    
+    client = AnthropicAPIClient(api_key="test-key", max_retries=1)
+    client.call_with_retry("Test prompt")
+    client.call_with_retry("Test prompt")
+    
+    assert mock_client.messages.create.call_count == 4
+
+
+def test_call_with_retry_does_not_cache_unparseable_stream(tmp_path, AnthropicAPIClient, mock_anthropic):
+    """Test that streamed text that is not the expected JSON is never cached or persisted."""
+    from claudecode.llm_cache import open_response_store
+    
+    mock_client = MagicMock()
+    mock_client.messages.stream.return_value.__enter__.return_value.text_stream = iter(['No verdict today'])
+    mock_anthropic.return_value = mock_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    client.exact_cache_store = open_response_store(str(tmp_path / "responses"))
+    success, response, _ = client.call_with_retry("Test prompt", stream=True)
+    
+    assert success
+    assert response == "No verdict today"
+    assert client._exact_cache == {}
+    assert len(client.exact_cache_store) == 0
+    client.close()
+
+
+def test_prewarm_validation_result_is_reused(AnthropicAPIClient, mock_anthropic):
+    """Test that wait_for_validation reuses the background pre-warm call."""
+    mock_client = Mock()
+    mock_anthropic.return_value = mock_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    client.prewarm()
+    client.prewarm()  # Second call is a no-op
+    success, error = client.wait_for_validation()
+    
+    assert success
+    assert error == ""
+    mock_client.messages.create.assert_called_once()
+
+
+def test_failed_prewarm_is_not_cached(AnthropicAPIClient, mock_anthropic):
+    """Test that a transient pre-warm failure is retried by the next wait_for_validation."""
+    mock_client = Mock()
+    mock_client.messages.create.side_effect = [Exception("503 Service Unavailable"), Mock()]
+    mock_anthropic.return_value = mock_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    client.prewarm()
+    
+    assert client.wait_for_validation()[0] is False
+    assert client.wait_for_validation() == (True, "")
+    assert client.wait_for_validation() == (True, "")
+    assert mock_client.messages.create.call_count == 2
+
+
+def test_wait_for_validation_without_prewarm(AnthropicAPIClient, mock_anthropic):
+    """Test that wait_for_validation validates synchronously without pre-warm."""
+    mock_client = Mock()
+    mock_client.messages.create.side_effect = Exception("API Error")
+    mock_anthropic.return_value = mock_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    success, error = client.wait_for_validation()
+    
+    assert not success
+    assert "API validation failed" in error
+
+
+def test_analyze_single_finding_cached(tmp_path, AnthropicAPIClient):
+    """Test that repeated findings are served from the prompt cache."""
+    client = AnthropicAPIClient(api_key="test-key")
+    client.prompt_cache = SemanticPromptCache(str(tmp_path / "cache.db"))
+    finding = {"file": "test.py", "line": 10, "description": "SQL injection"}
+    
+    with patch.object(client, 'analyze_single_finding') as mock_analyze:
+        mock_analyze.return_value = (True, {"keep_finding": True, "confidence_score": 9}, "")
         
-        assert client.original_model == "claude-3-sonnet-20240229"
-        assert client.model == "claude-3-sonnet@20240229"  # Converted format
-        assert client.project_id == "test-project"
-        assert client.region == "us-central1"
-        assert client.provider_name == "vertex"
-        mock_vertex_class.assert_called_once_with(
-            region="us-central1",
-            project_id="test-project"
-        )
-    
-    def test_init_missing_project(self):
-        """Test initialization without project ID raises error."""
-        with patch.dict('os.environ', {}, clear=True):
-            with pytest.raises(ValueError, match="No Google Cloud project ID found"):
-                VertexAIClient(model="claude-3-sonnet-20240229")
-    
-    def test_convert_model_name(self):
-        """Test model name conversion to Vertex AI format."""
-        with patch('claudecode.vertex_client.AnthropicVertex'):
-            client = VertexAIClient(
-                model="claude-opus-4-20250514",
-                project_id="test-project"
-            )
-            
-            assert client.model == "claude-opus-4@20250514"
-    
-    def test_convert_model_name_v2(self):
-        """Test model name conversion for v2 models."""
-        with patch('claudecode.vertex_client.AnthropicVertex'):
-            client = VertexAIClient(
-                model="claude-3-5-sonnet-v2-20241022",
-                project_id="test-project"
-            )
-            
-            # Should convert to claude-3-5-sonnet@20241022 (removes v2)
-            assert client.model == "claude-3-5-sonnet@20241022"
+        first = client.analyze_single_finding_cached(finding)
+        second = client.analyze_single_finding_cached(finding)
+    
+    assert first == second == (True, {"keep_finding": True, "confidence_score": 9}, "")
+    mock_analyze.assert_called_once()
+    client.close()
+
+
+def test_system_prompt_sent_as_cacheable_block(AnthropicAPIClient, mock_anthropic):
+    """Test that the system prompt is built once and sent with ephemeral cache_control."""
+    mock_client = Mock()
+    mock_client.messages.create.return_value.content = [Mock(text="{}")]
+    mock_anthropic.return_value = mock_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    system_prompt = client._generate_system_prompt("Only keep SQL injection findings")
+    client.call_with_retry("First", system_prompt=system_prompt)
+    client.call_with_retry("Second", system_prompt=client._generate_system_prompt("Only keep SQL injection findings"))
+    
+    first, second = (c.kwargs["system"] for c in mock_client.messages.create.call_args_list)
+    assert first is second
+    assert first == [{
+        "type": "text",
+        "text": system_prompt,
+        "cache_control": {"type": "ephemeral"}
+    }]
+    assert "Only keep SQL injection findings" in system_prompt
+
+
+def test_call_with_retry_stream_stops_at_json_end(AnthropicAPIClient, mock_anthropic):
+    """Test that streaming stops reading once the JSON verdict has closed."""
+    consumed = []
+    
+    def text_stream():
+        for chunk in ['{"keep_finding": ', 'true, "note": "}"', '}', ' Extra commentary', ' never read']:
+            consumed.append(chunk)
+            yield chunk
+    
+    mock_client = MagicMock()
+    mock_client.messages.stream.return_value.__enter__.return_value.text_stream = text_stream()
+    mock_anthropic.return_value = mock_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    success, response, error = client.call_with_retry("Test prompt", stream=True)
+    
+    assert success
+    assert json.loads(response) == {"keep_finding": True, "note": "}"}
+    assert len(consumed) == 3
+    mock_client.messages.stream.return_value.__exit__.assert_called_once()
+    mock_client.messages.create.assert_not_called()
 
 
-class TestBedrockClient:
-    """Test Bedrock client."""
+def test_call_with_retry_stream_skips_citation_before_json(AnthropicAPIClient, mock_anthropic):
+    """Test that a bracketed citation in prose does not end the stream early."""
+    mock_client = MagicMock()
+    mock_client.messages.stream.return_value.__enter__.return_value.text_stream = iter(
+        ['Per rule [1], ', '{"keep_finding": false}', ' done']
+    )
+    mock_anthropic.return_value = mock_client
     
-    @patch('claudecode.bedrock_client.AnthropicBedrock')
-    def test_init_with_region(self, mock_bedrock_class):
-        """Test initialization with AWS region."""
-        client = BedrockClient(
-            model="claude-3-sonnet-20240229",
-            aws_region="us-west-2"
-        )
+    client = AnthropicAPIClient(api_key="test-key")
+    success, response, _ = client.call_with_retry("Test prompt", stream=True)
+    
+    assert success
+    assert response == 'Per rule [1], {"keep_finding": false}'
+
+
+def test_call_with_retry_stream_reads_on_when_cut_text_does_not_parse(AnthropicAPIClient, mock_anthropic):
+    """Test that the full stream is read when the early-cut text fails to parse."""
+    chunks = ['Verdicts: [{"finding_id": 0}]', ' trailing', ' text']
+    mock_client = MagicMock()
+    mock_client.messages.stream.return_value.__enter__.return_value.text_stream = iter(chunks)
+    mock_anthropic.return_value = mock_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    success, response, _ = client.call_with_retry("Test prompt", stream=True, json_type=list)
+    
+    assert success
+    assert response == "".join(chunks)
+
+
+def test_context_manager_closes_client(AnthropicAPIClient, mock_anthropic):
+    """Test that leaving the context manager closes the SDK client."""
+    mock_client = Mock()
+    mock_anthropic.return_value = mock_client
+    
+    with AnthropicAPIClient(api_key="test-key") as client:
+        assert client.client is mock_client
+    
+    mock_client.close.assert_called_once()
+    assert client.client is None
+
+
+# Vertex AI client
+
+def test_init_with_project(VertexAIClient, mock_vertex):
+    """Test initialization with project ID."""
+    client = VertexAIClient(
+        model="claude-3-sonnet-20240229",
+        project_id="test-project",
+        region="us-central1"
+    )
+    
+    assert client.original_model == "claude-3-sonnet-20240229"
+    assert client.model == "claude-3-sonnet@20240229"  # Converted format
+    assert client.project_id == "test-project"
+    assert client.region == "us-central1"
+    assert client.provider_name == "vertex"
+    mock_vertex.assert_called_once_with(
+        region="us-central1",
+        project_id="test-project"
+    )
+
+
+def test_init_missing_project(monkeypatch, VertexAIClient):
+    """Test initialization without project ID raises error."""
+    monkeypatch.delenv("GOOGLE_CLOUD_PROJECT", raising=False)
+    
+    with pytest.raises(ValueError, match=_NO_PROJECT_ID):
+        VertexAIClient(model="claude-3-sonnet-20240229")
+
+
+# Bedrock client
+
+def test_init_with_region(BedrockClient, mock_bedrock):
+    """Test initialization with AWS region."""
+    client = BedrockClient(
+        model="claude-3-sonnet-20240229",
+        aws_region="us-west-2"
+    )
+    
+    assert client.original_model == "claude-3-sonnet-20240229"
+    assert client.model == "anthropic.claude-3-sonnet-20240229-v1:0"  # Converted format
+    assert client.aws_region == "us-west-2"
+    assert client.provider_name == "bedrock"
+    mock_bedrock.assert_called_once_with(aws_region="us-west-2")
+
+
+# Provider-specific model name conversion
+
+@pytest.mark.parametrize("cls_path, model, expected", [
+    ("claudecode.vertex_client:VertexAIClient", "claude-opus-4-20250514", "claude-opus-4@20250514"),
+    ("claudecode.vertex_client:VertexAIClient", "claude-3-5-sonnet-v2-20241022", "claude-3-5-sonnet-v2@20241022"),
+    ("claudecode.bedrock_client:BedrockClient", "claude-opus-4-20250514", "anthropic.claude-opus-4-20250514-v1:0"),
+    ("claudecode.bedrock_client:BedrockClient", "claude-3-5-sonnet-v2-20241022",
+     "anthropic.claude-3-5-sonnet-20241022-v2:0"),
+    ("claudecode.bedrock_client:BedrockClient", "anthropic.claude-3-sonnet-20240229-v1:0",
+     "anthropic.claude-3-sonnet-20240229-v1:0"),
+], ids=["vertex", "vertex-v2", "bedrock", "bedrock-v2", "bedrock-already-formatted"])
+def test_convert_model_name(cls_path, model, expected):
+    """Test model name conversion without constructing the client or its SDK."""
+    client = object.__new__(pkgutil.resolve_name(cls_path))
+    
+    assert client._convert_model_name(model) == expected
+
+
+# Shared retry and backoff behaviour in the base client
+
+def test_only_retries_are_logged_at_info(caplog, AnthropicAPIClient):
+    """Test that the first attempt is logged at DEBUG and retries at INFO."""
+    client = AnthropicAPIClient(api_key="test-key", max_retries=1)
+    call = Mock(side_effect=[Exception("Error code: 429 rate limit"), "ok"])
+    
+    with caplog.at_level('INFO', logger='claudecode.llm_client_base'):
+        client.retry(call)
+    
+    attempt_messages = [r.getMessage() for r in caplog.records if "API call attempt" in r.getMessage()]
+    assert attempt_messages == ["anthropic API call attempt 2/2"]
+
+
+def test_retry_recovers_from_rate_limit(AnthropicAPIClient):
+    """Test that a rate-limited call is retried and eventually succeeds."""
+    client = AnthropicAPIClient(api_key="test-key", max_retries=2)
+    call = Mock(side_effect=[Exception("Error code: 429 rate limit"), "ok"])
+    
+    with patch('claudecode.llm_client_base.time.sleep') as mock_sleep:
+        result = client.retry(call)
+    
+    assert result == (True, "ok", "")
+    assert call.call_count == 2
+    mock_sleep.assert_called_once()
+
+
+def test_retry_acquires_rate_limiter_per_attempt(AnthropicAPIClient):
+    """Test that every attempt passes through the rate limiter."""
+    client = AnthropicAPIClient(api_key="test-key", max_retries=1)
+    client.rate_limiter = Mock()
+    call = Mock(side_effect=[Exception("API Error"), "ok"])
+    
+    result = client.retry(call)
+    
+    assert result == (True, "ok", "")
+    assert client.rate_limiter.acquire.call_count == 2
+
+
+def test_validation_acquires_rate_limiter(AnthropicAPIClient):
+    """Test that the prewarm validation call passes through the rate limiter."""
+    client = AnthropicAPIClient(api_key="test-key")
+    client.rate_limiter = Mock()
+    
+    client.prewarm()
+    
+    assert client.wait_for_validation() == (True, "")
+    client.rate_limiter.acquire.assert_called_once()
+
+
+def test_retry_does_not_sleep_after_last_attempt(AnthropicAPIClient):
+    """Test that exhausting retries does not add a trailing sleep."""
+    client = AnthropicAPIClient(api_key="test-key", max_retries=2)
+    call = Mock(side_effect=Exception("API Error"))
+    
+    with patch('claudecode.llm_client_base.time.sleep') as mock_sleep:
+        success, response, error = client.retry(call)
+    
+    assert not success
+    assert error == "API call failed after 3 attempts: API Error"
+    assert mock_sleep.call_count == 2
+
+
+def test_retry_fails_fast_on_client_errors(AnthropicAPIClient):
+    """Test that non-retryable 4xx errors are not retried."""
+    client = AnthropicAPIClient(api_key="test-key", max_retries=3)
+    error = Exception("invalid x-api-key")
+    error.status_code = 401
+    call = Mock(side_effect=error)
+    
+    with patch('claudecode.llm_client_base.time.sleep') as mock_sleep:
+        success, _, error_msg = client.retry(call)
+    
+    assert not success
+    assert error_msg == "API call failed (non-retryable) after 1 attempt: invalid x-api-key"
+    call.assert_called_once()
+    mock_sleep.assert_not_called()
+
+
+def test_sleep_backoff_is_capped_decorrelated_jitter(AnthropicAPIClient):
+    """Test that backoff stays within [base, 3 * previous] and under the cap."""
+    client = AnthropicAPIClient(api_key="test-key")
+    
+    delay = 0.5
+    for attempt in range(20):
+        new_delay = client._sleep_backoff(attempt, delay)
+        assert 0.5 <= new_delay <= min(30, delay * 3)
+        delay = new_delay
+
+
+def test_sleep_backoff_honors_retry_after(AnthropicAPIClient):
+    """Test that a Retry-After header raises the delay, up to the cap."""
+    client = AnthropicAPIClient(api_key="test-key")
+    error = Exception("rate limited")
+    error.response = Mock(headers={"retry-after": "12"})
+    
+    retry_after = client._retry_after_seconds(error)
+    with patch('claudecode.llm_client_base.time.sleep') as mock_sleep:
+        delay = client._sleep_backoff(0, 0.5, retry_after)
+    
+    assert retry_after == 12.0
+    assert delay == 12.0
+    mock_sleep.assert_called_once_with(12.0)
+    assert client._sleep_backoff(0, 0.5, 300.0) == 30
+
+
+# Multi-finding batch analysis in the base client
+
+def test_analyze_findings_batch_maps_verdicts_by_id(AnthropicAPIClient):
+    """Test that verdicts are matched to findings by finding_id."""
+    client = AnthropicAPIClient(api_key="test-key")
+    findings = [{"description": "first"}, {"description": "second"}]
+    response = json.dumps([
+        {"finding_id": 1, "keep_finding": False, "confidence_score": 2},
+        {"finding_id": 0, "keep_finding": True, "confidence_score": 9},
+    ])
+    
+    with patch.object(client, 'call_with_retry', return_value=(True, response, "")) as mock_call:
+        results = client.analyze_findings_batch(findings)
+    
+    mock_call.assert_called_once()
+    assert results == [
+        (True, {"keep_finding": True, "confidence_score": 9}, ""),
+        (True, {"keep_finding": False, "confidence_score": 2}, ""),
+    ]
+
+
+def test_analyze_findings_batch_chunks_and_reports_missing(AnthropicAPIClient):
+    """Test chunking by batch_size and errors for findings without a verdict."""
+    client = AnthropicAPIClient(api_key="test-key")
+    findings = [{"description": f"finding {i}"} for i in range(3)]
+    responses = [
+        (True, json.dumps([{"finding_id": 0, "keep_finding": True}]), ""),
+        (False, "", "API call failed"),
+    ]
+    
+    with patch.object(client, 'call_with_retry', side_effect=responses) as mock_call:
+        results = client.analyze_findings_batch(findings, batch_size=2)
+    
+    assert mock_call.call_count == 2
+    assert results[0] == (True, {"keep_finding": True}, "")
+    assert results[1][0] is False
+    assert "No verdict returned" in results[1][2]
+    assert results[2] == (False, {}, "API call failed")
+
+
+# Async request path and concurrent finding analysis
+
+def test_acall_with_retry_success(mock_async_anthropic, mock_response, AnthropicAPIClient):
+    """Test async API call through the lazily created async client."""
+    mock_async_client = Mock()
+    mock_async_client.messages.create = AsyncMock(return_value=mock_response)
+    mock_async_anthropic.return_value = mock_async_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    mock_async_anthropic.assert_not_called()
+    
+    success, response, error = asyncio.run(client.acall_with_retry("Test prompt", "System"))
+    
+    assert success
+    assert response == "Test response"
+    assert error == ""
+    mock_async_anthropic.assert_called_once_with(api_key="test-key")
+    assert mock_async_client.messages.create.call_args.kwargs["system"][0]["text"] == "System"
+
+
+def test_acall_with_retry_retries_without_blocking(mock_async_anthropic, AnthropicAPIClient):
+    """Test that async retries back off with asyncio.sleep."""
+    mock_response = Mock()
+    mock_response.content = [Mock(text="ok")]
+    mock_async_client = Mock()
+    mock_async_client.messages.create = AsyncMock(side_effect=[Exception("429 rate limit"), mock_response])
+    mock_async_anthropic.return_value = mock_async_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    with patch('claudecode.llm_client_base.asyncio.sleep', new=AsyncMock()) as mock_sleep, \
+         patch('claudecode.llm_client_base.time.sleep') as mock_time_sleep:
+        success, response, _ = asyncio.run(client.acall_with_retry("Test prompt"))
+    
+    assert success
+    assert response == "ok"
+    mock_sleep.assert_awaited_once()
+    mock_time_sleep.assert_not_called()
+
+
+def test_acall_with_retry_stream(mock_async_anthropic, AnthropicAPIClient):
+    """Test that the async streaming path stops once the JSON value closes."""
+    async def text_stream():
+        for chunk in ['[{"finding_id": 0}', ']', ' trailing']:
+            yield chunk
+    
+    mock_stream = Mock()
+    mock_stream.text_stream = text_stream()
+    mock_async_client = MagicMock()
+    mock_async_client.messages.stream.return_value.__aenter__ = AsyncMock(return_value=mock_stream)
+    mock_async_client.messages.stream.return_value.__aexit__ = AsyncMock(return_value=False)
+    mock_async_anthropic.return_value = mock_async_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    success, response, _ = asyncio.run(client.acall_with_retry("Test prompt", stream=True, json_type=list))
+    
+    assert success
+    assert response == '[{"finding_id": 0}]'
+
+
+def test_analyze_many_bounds_concurrency(AnthropicAPIClient):
+    """Test that analyze_many keeps at most `concurrency` requests in flight, in order."""
+    client = AnthropicAPIClient(api_key="test-key")
+    findings = [{"description": f"finding {i}"} for i in range(6)]
+    in_flight = 0
+    peak = 0
+    
+    async def fake_analyze(finding, pr_context=None, custom_filtering_instructions=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return True, {"description": finding["description"]}, ""
+    
+    with patch.object(client, 'aanalyze_single_finding', side_effect=fake_analyze):
+        results = asyncio.run(client.analyze_many(findings, concurrency=2))
+    
+    assert peak == 2
+    assert [r[1]["description"] for r in results] == [f["description"] for f in findings]
+
+
+def test_analyze_findings_concurrently_reports_errors_per_finding(AnthropicAPIClient):
+    """Test that one failing finding does not fail the whole run."""
+    client = AnthropicAPIClient(api_key="test-key")
+    
+    async def fake_analyze(finding, pr_context=None, custom_filtering_instructions=None):
+        if finding["description"] == "bad":
+            raise RuntimeError("boom")
+        return True, {"keep_finding": True}, ""
+    
+    with patch.object(client, 'aanalyze_single_finding', side_effect=fake_analyze):
+        results = client.analyze_findings_concurrently([{"description": "good"}, {"description": "bad"}])
+    
+    assert results[0] == (True, {"keep_finding": True}, "")
+    assert results[1][0] is False
+    assert "boom" in results[1][2]
+
+
+def test_analyze_findings_concurrently_reuses_async_client(mock_async_anthropic, AnthropicAPIClient):
+    """Test that the async client lives until close() instead of one per call."""
+    async def text_stream():
+        yield '{"keep_finding": true}'
+    
+    def open_stream(**kwargs):
+        stream = MagicMock()
+        stream.__aenter__ = AsyncMock(return_value=Mock(text_stream=text_stream()))
+        stream.__aexit__ = AsyncMock(return_value=False)
+        return stream
+    
+    mock_async_client = MagicMock()
+    mock_async_client.messages.stream.side_effect = open_stream
+    mock_async_client.close = AsyncMock()
+    mock_async_anthropic.return_value = mock_async_client
+    
+    client = AnthropicAPIClient(api_key="test-key")
+    first = client.analyze_findings_concurrently([{"description": "first"}])
+    second = client.analyze_findings_concurrently([{"description": "second"}])
+    
+    assert first == second == [(True, {"keep_finding": True}, "")]
+    mock_async_anthropic.assert_called_once()
+    assert mock_async_client.messages.stream.call_count == 2
+    mock_async_client.close.assert_not_awaited()
+    
+    client.close()
+    mock_async_client.close.assert_awaited_once()
+
+
+# Interface shared by all clients (one xdist group, so all_clients is built once)
+
+@pytest.mark.xdist_group(name="all_clients")
+def test_all_clients_implement_interface(all_clients):
+    """Test that all clients implement the same methods."""
+    for client in all_clients:
+        # Check all required methods exist
+        assert hasattr(client, 'validate_api_access')
+        assert hasattr(client, 'call_with_retry')
+        assert hasattr(client, 'analyze_single_finding')
+        assert hasattr(client, 'provider_name')
         
-        assert client.original_model == "claude-3-sonnet-20240229"
-        assert client.model == "anthropic.claude-3-sonnet-20240229-v1:0"  # Converted format
-        assert client.aws_region == "us-west-2"
-        assert client.provider_name == "bedrock"
-        mock_bedrock_class.assert_called_once_with(aws_region="us-west-2")
-    
-    def test_convert_model_name(self):
-        """Test model name conversion to Bedrock format."""
-        with patch('claudecode.bedrock_client.AnthropicBedrock'):
-            client = BedrockClient(
-                model="claude-opus-4-20250514",
-                aws_region="us-east-1"
-            )
-            
-            assert client.model == "anthropic.claude-opus-4-20250514-v1:0"
-    
-    def test_convert_model_name_v2(self):
-        """Test model name conversion for v2 models."""
-        with patch('claudecode.bedrock_client.AnthropicBedrock'):
-            client = BedrockClient(
-                model="claude-3-5-sonnet-v2-20241022",
-                aws_region="us-east-1"
-            )
-            
-            # Should convert to anthropic.claude-3-5-sonnet-20241022-v2:0
-            assert client.model == "anthropic.claude-3-5-sonnet-20241022-v2:0"
-    
-    def test_convert_model_name_already_formatted(self):
-        """Test model name conversion when already in Bedrock format."""
-        with patch('claudecode.bedrock_client.AnthropicBedrock'):
-            client = BedrockClient(
-                model="anthropic.claude-3-sonnet-20240229-v1:0",
-                aws_region="us-east-1"
-            )
-            
-            # Should remain unchanged
-            assert client.model == "anthropic.claude-3-sonnet-20240229-v1:0"
-
-
-class TestClientInterfaces:
-    """Test that all clients implement the same interface."""
-    
-    @patch('claudecode.anthropic_client.Anthropic')
-    @patch('claudecode.vertex_client.AnthropicVertex')
-    @patch('claudecode.bedrock_client.AnthropicBedrock')
-    def test_all_clients_implement_interface(self, mock_bedrock, mock_vertex, mock_anthropic):
-        """Test that all clients implement the same methods."""
-        clients = [
-            AnthropicAPIClient(api_key="test-key"),
-            VertexAIClient(project_id="test-project"),
-            BedrockClient(aws_region="us-east-1")
-        ]
+        # Check methods are callable
+        assert callable(client.validate_api_access)
+        assert callable(client.call_with_retry)
+        assert callable(client.analyze_single_finding)
         
-        for client in clients:
-            # Check all required methods exist
-            assert hasattr(client, 'validate_api_access')
-            assert hasattr(client, 'call_with_retry')
-            assert hasattr(client, 'analyze_single_finding')
-            assert hasattr(client, 'provider_name')
-            
-            # Check methods are callable
-            assert callable(client.validate_api_access)
-            assert callable(client.call_with_retry)
-            assert callable(client.analyze_single_finding)
+        # Check provider_name returns string
+        assert isinstance(client.provider_name, str)
+
+
+@pytest.mark.xdist_group(name="all_clients")
+def test_analyze_single_finding_interface(all_clients):
+    """Test that analyze_single_finding has consistent interface across clients."""
+    for client in all_clients:
+        # Mock the internal API calls to avoid actual network requests
+        with patch.object(client, 'call_with_retry') as mock_call:
+            mock_call.return_value = (True, '{"keep_finding": true, "confidence_score": 8}', "")
             
-            # Check provider_name returns string
-            assert isinstance(client.provider_name, str)
-    
-    @patch('claudecode.anthropic_client.Anthropic')
-    @patch('claudecode.vertex_client.AnthropicVertex')
-    @patch('claudecode.bedrock_client.AnthropicBedrock')
-    def test_analyze_single_finding_interface(self, mock_bedrock, mock_vertex, mock_anthropic):
-        """Test that analyze_single_finding has consistent interface across clients."""
-        clients = [
-            AnthropicAPIClient(api_key="test-key"),
-            VertexAIClient(project_id="test-project"),
-            BedrockClient(aws_region="us-east-1")
-        ]
-        
-        test_finding = {
-            "file": "test.py",
-            "line": 10,
-            "severity": "HIGH",
-            "description": "Test finding"
-        }
-        
-        test_context = {
-            "repo_name": "test/repo",
-            "pr_number": 123
-        }
-        
-        for client in clients:
-            # Mock the internal API calls to avoid actual network requests
-            with patch.object(client, 'call_with_retry') as mock_call:
-                mock_call.return_value = (True, '{"keep_finding": true, "confidence_score": 8}', "")
+            with patch.object(client, '_read_file') as mock_read:
+                mock_read.return_value = (True, "test content", "")
+                
+                # Test method signature is consistent
+                success, result, error = client.analyze_single_finding(
+                    finding=_FINDING,
+                    pr_context=_CONTEXT,
+                    custom_filtering_instructions="test instructions"
+                )
                 
-                with patch.object(client, '_read_file') as mock_read:
-                    mock_read.return_value = (True, "test content", "")
-                    
-                    # Test method signature is consistent
-                    success, result, error = client.analyze_single_finding(
-                        finding=test_finding,
-                        pr_context=test_context,
-                        custom_filtering_instructions="test instructions"
-                    )
-                    
-                    # Check return types
-                    assert isinstance(success, bool)
-                    assert isinstance(result, dict)
-                    assert isinstance(error, str)
-
-
-if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+                # Check return types
+                assert isinstance(success, bool)
+                assert isinstance(result, dict)
+                assert isinstance(error, str)
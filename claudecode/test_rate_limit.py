@@ -0,0 +1,81 @@
+"""Unit tests for the rate_limit module."""
+
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from claudecode.rate_limit import TokenBucket, get_shared_bucket
+
+
+class TestTokenBucket:
+    """Test token bucket rate limiter."""
+
+    def test_burst_then_empty(self):
+        """Test that a full bucket allows exactly burst requests without waiting."""
+        bucket = TokenBucket(rate_per_sec=0.001, burst=3)
+
+        assert all(bucket.try_acquire() for _ in range(3))
+        assert not bucket.try_acquire()
+
+    def test_refills_over_time(self):
+        """Test that tokens are replenished based on elapsed time."""
+        with patch('claudecode.rate_limit.time.monotonic', return_value=100.0):
+            bucket = TokenBucket(rate_per_sec=2.0, burst=1)
+            assert bucket.try_acquire()
+            assert not bucket.try_acquire()
+
+        with patch('claudecode.rate_limit.time.monotonic', return_value=100.5):
+            assert bucket.try_acquire()
+
+    def test_acquire_waits_for_tokens(self):
+        """Test that acquire sleeps for the time needed to refill a token."""
+        clock = [100.0]
+
+        def fake_sleep(seconds):
+            clock[0] += seconds
+
+        with patch('claudecode.rate_limit.time.monotonic', side_effect=lambda: clock[0]), \
+             patch('claudecode.rate_limit.time.sleep', side_effect=fake_sleep) as mock_sleep:
+            bucket = TokenBucket(rate_per_sec=4.0, burst=1)
+            assert bucket.acquire() == 0.0
+            waited = bucket.acquire()
+
+        assert waited == pytest.approx(0.25)
+        mock_sleep.assert_called_once()
+
+    def test_aacquire_waits_without_blocking(self):
+        """Test that aacquire waits with asyncio.sleep rather than time.sleep."""
+        clock = [100.0]
+
+        async def fake_sleep(seconds):
+            clock[0] += seconds
+
+        with patch('claudecode.rate_limit.time.monotonic', side_effect=lambda: clock[0]), \
+             patch('claudecode.rate_limit.asyncio.sleep', new=AsyncMock(side_effect=fake_sleep)), \
+             patch('claudecode.rate_limit.time.sleep') as mock_time_sleep:
+            bucket = TokenBucket(rate_per_sec=2.0, burst=1)
+            assert asyncio.run(bucket.aacquire()) == 0.0
+            waited = asyncio.run(bucket.aacquire())
+
+        assert waited == pytest.approx(0.5)
+        mock_time_sleep.assert_not_called()
+
+    def test_invalid_parameters(self):
+        """Test that nonsensical limits are rejected."""
+        with pytest.raises(ValueError):
+            TokenBucket(rate_per_sec=0, burst=1)
+
+
+class TestSharedBucket:
+    """Test process-wide bucket registry."""
+
+    def test_same_quota_shares_bucket(self):
+        """Test that the same name and rate return the same bucket."""
+        assert get_shared_bucket("test-provider", 50) is get_shared_bucket("test-provider", 50)
+
+    def test_bucket_sized_from_requests_per_minute(self):
+        """Test that the bucket refills at the per-minute rate."""
+        bucket = get_shared_bucket("test-sizing", 120)
+
+        assert bucket.rate_per_sec == 2.0
+        assert bucket.burst == 120